@@ -7,20 +7,23 @@
 """
 
 import argparse
+import fcntl
 import gettext
 import importlib
 import json
 import locale
 import logging
+import math
 import mmap
 import os
+import signal
 import struct
 import subprocess
 import sys
+import threading
 import time
 
 import pygame
-import requests
 from PIL import Image
 
 try:
@@ -31,55 +34,262 @@ except ImportError:
 
 from modules.BuiltIn import (Alerts, Clock, Location, MoonPhase, SunriseSuset,
                              Weather, WeatherForecast, Wind)
+from modules.Cache import Cache
+from modules.HttpClient import HttpClient
+from modules.IconCache import IconCache
+from modules.MoonIcons import MoonIcons
+from modules.Profiler import Profiler
 from modules.RepeatedTimer import RepeatedTimer
+from modules.Scheduler import DrawScheduler, Scheduler
+from modules.WeatherModule import FrameTracker, Utils
+
+# linux/fb.h
+FBIOGET_VSCREENINFO = 0x4600
+FBIOPUT_VSCREENINFO = 0x4601
+FBIOPAN_DISPLAY = 0x4606
+FB_VAR_SCREENINFO = struct.Struct("40I")
 
 
 class FrameBuffer:
     """Write pygame.Surface directly to a Linux framebuffer device via mmap."""
 
-    def __init__(self, device, width, height):
+    def __init__(self, device, width, height, double_buffer=False, console=True,
+                 bpp=None):
         self.width = width
         self.height = height
         self._cursor_hidden = False
 
-        try:
-            with open("/dev/tty1", "wb") as tty:
-                tty.write(b"\033[?25l")
-            self._cursor_hidden = True
-        except OSError:
-            pass
+        if console:
+            try:
+                with open("/dev/tty1", "wb") as tty:
+                    tty.write(b"\033[?25l")
+                self._cursor_hidden = True
+            except OSError:
+                pass
 
-        fb_name = os.path.basename(device)
-        try:
-            with open("/sys/class/graphics/{}/bits_per_pixel".format(fb_name)) as f:
-                self.bpp = int(f.read().strip())
-        except OSError:
-            self.bpp = 16
+        self._sysfs = "/sys/class/graphics/{}".format(os.path.basename(device))
+        if bpp is None:
+            bpp = self._read_sysfs("bits_per_pixel")
+        self.bpp = int(bpp) if bpp else 16
 
         try:
-            self._size = width * height * (self.bpp // 8)
             self._file = open(device, "r+b")
+            self._pages = 2 if double_buffer and self._enable_double_buffer() else 1
+            stride = self._read_sysfs("stride")
+            self._stride = int(stride) if stride else width * (self.bpp // 8)
+            self._size = self._stride * height * self._pages
             self._mmap = mmap.mmap(self._file.fileno(), self._size)
         except OSError:
             self._restore_console()
             raise
-        logging.info("framebuffer %s: %dx%d %dbpp", device, width, height, self.bpp)
+        self._page = 0  # page currently on screen
+        self._pending = None  # rects the back page is missing, None for all
+        if self._pages == 2 and not self._pan_test():
+            logging.info("framebuffer %s: panning failed, double buffering disabled",
+                         device)
+            self._pages = 1
+        self.masks = self._read_masks()
+        self._rawmode = self._pack_mode()
+        if self._rawmode is None:
+            logging.warning("framebuffer %s: %dbpp masks:%s not supported",
+                            device, self.bpp, self.masks)
+        logging.info("framebuffer %s: %dx%d %dbpp stride:%d pages:%d masks:%s",
+                     device, width, height, self.bpp, self._stride,
+                     self._pages, self.masks)
+
+    def native_surface(self):
+        """Create a pygame.Surface in the framebuffer pixel format.
+
+        Returns None when pygame cannot represent the framebuffer layout.
+        """
+        if self.masks is None:
+            return None
+        try:
+            surface = pygame.Surface((self.width, self.height), 0, self.bpp,
+                                     self.masks)
+        except (pygame.error, ValueError) as e:
+            logging.info("framebuffer layout not supported by pygame: %s", e)
+            return None
+        if not self._is_native(surface):
+            return None
+        return surface
+
+    def write(self, surface, rects=None):
+        """Write pygame.Surface to the framebuffer via mmap.
+
+        A surface created by native_surface() is copied as is; any other
+        surface is converted to the framebuffer pixel format first.
+        When rects is given, only the rows they cover are written.
+        With double buffering the rows are written to the back page, which
+        is then shown with the pan-display ioctl.
+        """
+        if rects is not None and not rects:
+            return
+        page = self._page
+        if self._pages == 2:
+            # the back page also lacks whatever changed in the previous frame
+            page = 1 - self._page
+            pending, self._pending = self._pending, rects
+            rects = None if rects is None or pending is None else rects + pending
+        base = page * self.height * self._stride
+        spans = self._row_spans(rects)
+
+        if self._is_native(surface):
+            view = surface.get_view("1")
+            try:
+                pixels = memoryview(view).cast("B")
+                for top, bottom in spans:
+                    self._put_rows(base, top, bottom, pixels,
+                                   surface.get_pitch(), top)
+                pixels.release()
+            finally:
+                del view
+        elif self._rawmode is not None:
+            for top, bottom in spans:
+                area = surface.subsurface((0, top, self.width, bottom - top))
+                raw = pygame.image.tobytes(area, "RGB")
+                image = Image.frombytes("RGB", area.get_size(), raw)
+                if self._rawmode == "BGR;16":
+                    image = Image.merge("RGB", image.split()[::-1])
+                if self.bpp == 16:
+                    data = self._to_rgb565(image)
+                else:
+                    data = image.tobytes("raw", self._rawmode)
+                self._put_rows(base, top, bottom, data,
+                               self.width * (self.bpp // 8), 0)
+
+        if page != self._page:
+            self._pan(page)
+
+    def _is_native(self, surface):
+        """Check whether surface pixels can be copied to the framebuffer as is."""
+        return (self.masks is not None
+                and surface.get_size() == (self.width, self.height)
+                and surface.get_bitsize() == self.bpp
+                and surface.get_masks()[:3] == self.masks[:3])
+
+    def _pack_mode(self):
+        """Return the PIL raw mode that packs RGB into the framebuffer layout.
+
+        "RGB;16" and "BGR;16" stand for RGB565 and BGR565, None is returned
+        for layouts that cannot be packed.
+        """
+        if self.masks is None:
+            return None
+        if self.bpp == 16:
+            return {
+                (0xF800, 0x07E0, 0x001F): "RGB;16",
+                (0x001F, 0x07E0, 0xF800): "BGR;16",
+            }.get(self.masks[:3])
+        if self.bpp not in (24, 32):
+            return None
+        # channel of each byte of a little-endian pixel
+        channels = ["X"] * (self.bpp // 8)
+        for channel, mask in zip("RGB", self.masks):
+            byte = [i for i in range(len(channels)) if mask == 0xFF << 8 * i]
+            if not byte:
+                return None
+            channels[byte[0]] = channel
+        rawmode = "".join(channels)
+        return rawmode if rawmode in ("RGB", "BGR", "RGBX", "BGRX", "XRGB",
+                                      "XBGR") else None
+
+    def _put_rows(self, base, top, bottom, pixels, pitch, first):
+        """Copy rows top..bottom from pixels, starting at row first, into the mmap."""
+        src = first * pitch
+        dst = base + top * self._stride
+        if pitch == self._stride:
+            size = (bottom - top) * pitch
+            self._mmap[dst:dst + size] = pixels[src:src + size]
+            return
+        row_bytes = self.width * (self.bpp // 8)
+        for _ in range(top, bottom):
+            self._mmap[dst:dst + row_bytes] = pixels[src:src + row_bytes]
+            src += pitch
+            dst += self._stride
+
+    def _read_sysfs(self, name):
+        """Read an attribute of the framebuffer from sysfs, or None."""
+        try:
+            with open("{}/{}".format(self._sysfs, name)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
 
-    def write(self, surface):
-        """Convert pygame.Surface to the framebuffer pixel format and write via mmap."""
-        raw = pygame.image.tobytes(surface, "RGB")
-        image = Image.frombytes("RGB", (self.width, self.height), raw)
-        data = self._to_rgb565(image) if self.bpp == 16 else image.convert("RGBX").tobytes()
-        self._mmap.seek(0)
-        self._mmap.write(data)
+    def _enable_double_buffer(self):
+        """Make the virtual framebuffer at least twice the visible height."""
+        virtual_size = self._read_sysfs("virtual_size")
+        if virtual_size and int(virtual_size.split(",")[1]) >= 2 * self.height:
+            return True
+        try:
+            fields = list(FB_VAR_SCREENINFO.unpack(
+                fcntl.ioctl(self._file, FBIOGET_VSCREENINFO,
+                            bytes(FB_VAR_SCREENINFO.size))))
+            fields[3] = 2 * self.height  # yres_virtual
+            fcntl.ioctl(self._file, FBIOPUT_VSCREENINFO,
+                        FB_VAR_SCREENINFO.pack(*fields))
+        except OSError as e:
+            logging.info("framebuffer: cannot resize virtual framebuffer: %s", e)
+            return False
+        virtual_size = self._read_sysfs("virtual_size")
+        return bool(virtual_size) and \
+            int(virtual_size.split(",")[1]) >= 2 * self.height
+
+    def _pan(self, page):
+        """Show page with the pan-display ioctl."""
+        fields = list(FB_VAR_SCREENINFO.unpack(
+            fcntl.ioctl(self._file, FBIOGET_VSCREENINFO,
+                        bytes(FB_VAR_SCREENINFO.size))))
+        fields[4] = 0  # xoffset
+        fields[5] = page * self.height  # yoffset
+        fcntl.ioctl(self._file, FBIOPAN_DISPLAY, FB_VAR_SCREENINFO.pack(*fields))
+        self._page = page
+
+    def _pan_test(self):
+        """Check that the driver can pan between the two pages."""
+        try:
+            self._pan(1)
+            self._pan(0)
+            return True
+        except OSError:
+            return False
+
+    def _read_masks(self):
+        """Read the RGB channel layout of the framebuffer.
+
+        Falls back to RGB565 or XRGB8888 when the device does not answer
+        FBIOGET_VSCREENINFO (e.g. a regular file used for testing).
+        """
+        try:
+            info = fcntl.ioctl(self._file, FBIOGET_VSCREENINFO,
+                               bytes(FB_VAR_SCREENINFO.size))
+            fields = FB_VAR_SCREENINFO.unpack(info)
+            masks = []
+            for index in (8, 11, 14):  # red, green, blue (offset, length)
+                offset, length = fields[index], fields[index + 1]
+                masks.append(((1 << length) - 1) << offset)
+            return tuple(masks) + (0,)
+        except OSError:
+            pass
+        if self.bpp == 16:
+            return (0xF800, 0x07E0, 0x001F, 0)
+        if self.bpp in (24, 32):
+            return (0xFF0000, 0x00FF00, 0x0000FF, 0)
+        return None
 
     def blank(self):
         """Fill the framebuffer with black."""
         self._mmap.seek(0)
         self._mmap.write(b'\x00' * self._size)
+        self._pending = None
 
     def close(self):
         self.blank()
+        try:
+            if self._page != 0:
+                self._pan(0)
+        except OSError:
+            pass
         try:
             self._mmap.close()
         finally:
@@ -97,6 +307,22 @@ class FrameBuffer:
         except OSError:
             pass
 
+    def _row_spans(self, rects):
+        """Merge rects into sorted, non-overlapping (top, bottom) row spans."""
+        if rects is None:
+            return [(0, self.height)]
+        spans = []
+        for rect in sorted(rects, key=lambda rect: rect.top):
+            top = max(rect.top, 0)
+            bottom = min(rect.bottom, self.height)
+            if rect.width <= 0 or top >= bottom:
+                continue
+            if spans and top <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(spans[-1][1], bottom))
+            else:
+                spans.append((top, bottom))
+        return spans
+
     @staticmethod
     def _to_rgb565(image):
         """Convert a PIL RGB image to little-endian RGB565 bytes."""
@@ -106,24 +332,138 @@ class FrameBuffer:
                      ((arr[:, :, 1] & 0xFC) << 3) | \
                      (arr[:, :, 2] >> 3)
             return rgb565.astype('<u2').tobytes()
+        return rgb_to_rgb565(image.tobytes())
+
+
+# RGB565 lookup tables: the bits each 8-bit channel contributes to the
+# high and low byte of a little-endian RGB565 pixel
+_RGB565_RED_HIGH = bytes(v & 0xF8 for v in range(256))
+_RGB565_GREEN_HIGH = bytes(v >> 5 for v in range(256))
+_RGB565_GREEN_LOW = bytes((v & 0x1C) << 3 for v in range(256))
+_RGB565_BLUE_LOW = bytes(v >> 3 for v in range(256))
+
+
+def _or_bytes(a, b):
+    """Bitwise OR of two equal length byte strings."""
+    return (int.from_bytes(a, "little") |
+            int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+def rgb_to_rgb565(raw):
+    """Convert packed RGB bytes to little-endian RGB565 bytes without NumPy.
+
+    Each channel is split out with a slice, mapped through a lookup table
+    with bytes.translate and merged with integer OR, so no Python code
+    runs per pixel.
+    """
+    red, green, blue = raw[0::3], raw[1::3], raw[2::3]
+    high = _or_bytes(red.translate(_RGB565_RED_HIGH),
+                     green.translate(_RGB565_GREEN_HIGH))
+    low = _or_bytes(green.translate(_RGB565_GREEN_LOW),
+                    blue.translate(_RGB565_BLUE_LOW))
+    buf = bytearray(len(raw) // 3 * 2)
+    buf[0::2] = low
+    buf[1::2] = high
+    return bytes(buf)
+
+
+class Scaler:
+    """Fullscreen display of another size than the screen.
+
+    The screen is scaled to fit the display keeping its aspect ratio.
+    Only the updated areas are scaled, straight into the display surface.
+    With renderer, the screen is uploaded to a streaming SDL2 texture and
+    scaled by the SDL renderer instead, on the GPU where available.
+    """
+
+    def __init__(self, size, renderer=False):
+        self.size = tuple(size)
+        self.display = None
+        self._renderer = None
+        if renderer:
+            try:
+                from pygame._sdl2.video import (  # pylint: disable=import-outside-toplevel
+                    Renderer, Texture, Window)
+                window = Window("WeatherPi", fullscreen_desktop=True)
+                self._renderer = Renderer(window, accelerated=-1)
+                self._texture = Texture(self._renderer,
+                                        self.size,
+                                        streaming=True)
+                display_size = window.size
+            except (ImportError, pygame.error) as e:
+                logging.warning("SDL2 renderer not available: %s", e)
+                self._renderer = None
+        if self._renderer is None:
+            self.display = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            display_size = self.display.get_size()
+
+        (display_w, display_h) = display_size
+        (screen_w, screen_h) = self.size
+        if display_w / screen_w * screen_h <= display_h:
+            self.scale = (display_w, int(display_w / screen_w * screen_h))
         else:
-            pixels = list(image.getdata())
-            buf = bytearray(len(pixels) * 2)
-            for i, (r, g, b) in enumerate(pixels):
-                struct.pack_into('<H', buf, i * 2,
-                                 ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3))
-            return bytes(buf)
+            self.scale = (int(display_h / screen_h * screen_w), display_h)
+        self._ratio = (self.scale[0] / screen_w, self.scale[1] / screen_h)
+
+    def surface(self):
+        """Create a pygame.Surface for the screen in the display format."""
+        if self.display is None:
+            return pygame.Surface(self.size)
+        return pygame.Surface(self.size, 0, self.display)
+
+    def write(self, surface, rects=None):
+        """Scale pygame.Surface to the display.
+
+        When rects is given, only the areas they cover are scaled.
+        """
+        if rects is None:
+            rects = [surface.get_rect()]
+        if self._renderer is not None:
+            for rect in rects:
+                rect = pygame.Rect(rect).clip(surface.get_rect())
+                if not rect.width or not rect.height:
+                    continue
+                self._texture.update(surface.subsurface(rect), rect)
+            self._renderer.clear()
+            self._texture.draw(dstrect=pygame.Rect((0, 0), self.scale))
+            self._renderer.present()
+            return
+
+        updates = []
+        for rect in rects:
+            rect = pygame.Rect(rect).clip(surface.get_rect())
+            if not rect.width or not rect.height:
+                continue
+            left = int(rect.left * self._ratio[0])
+            top = int(rect.top * self._ratio[1])
+            right = min(int(math.ceil(rect.right * self._ratio[0])),
+                        self.scale[0])
+            bottom = min(int(math.ceil(rect.bottom * self._ratio[1])),
+                         self.scale[1])
+            dest = pygame.Rect(left, top, right - left, bottom - top)
+            pygame.transform.scale(surface.subsurface(rect), dest.size,
+                                   self.display.subsurface(dest))
+            updates.append(dest)
+        pygame.display.update(updates)
+
+    def blank(self):
+        """Blank the display."""
+        if self._renderer is not None:
+            self._renderer.clear()
+            self._renderer.present()
+        else:
+            self.display.fill(pygame.Color("black"))
+            pygame.display.flip()
 
 
 def weather_forecast(appid, latitude, longitude, language, units):
     """get weather forcast data using openweather api
     """
     try:
-        response = requests.get(
+        response = HttpClient.get(
             "https://api.openweathermap.org/data/3.0/onecall" +
             "?appid={}&lat={}&lon={}&lang={}&units={}".format(
-                appid, latitude, longitude, language, units),
-            timeout=10)
+                appid, latitude, longitude, language, units))
         response.raise_for_status()
         return response.json()
 
@@ -132,19 +472,33 @@ def weather_forecast(appid, latitude, longitude, language, units):
         return None
 
 
+def cached_weather_forecast(cache, key, *args):
+    """get weather forcast data and keep the last good response in cache,
+    and prefetch its weather icons
+    """
+    weather = weather_forecast(*args)
+    if weather is not None:
+        cache.save(key, weather)
+    else:
+        weather, _age = cache.load(key)
+    if weather is not None:
+        # make the icons ready before the modules draw the new data
+        IconCache.prefetch(weather)
+    return weather
+
+
 def geocode(key, language, address, latitude, longitude):
     """get latitude, longitude from address using google geocode api
     """
     try:
-        response = requests.get(
+        response = HttpClient.get(
             "https://maps.googleapis.com/maps/api/geocode/json",
             params={
                 "address": address,
                 "language": language,
                 "latlng": "{},{}".format(latitude, longitude),
                 "key": key
-            },
-            timeout=10)
+            })
         response.raise_for_status()
         data = response.json()
         location = data["results"][0]["geometry"]["location"]
@@ -162,6 +516,75 @@ def geocode(key, language, address, latitude, longitude):
         return None
 
 
+def load_modules(config, language):
+    """load built-in and external modules listed in config
+    """
+    location = {
+        "latitude": config["latitude"],
+        "longitude": config["longitude"],
+        "address": config["address"]
+    }
+    units = config["units"]
+    fonts = config["fonts"]
+    modules = []
+    for module in config["modules"]:
+        name = module["module"]
+        conf = module["config"]
+        if name in globals():
+            logging.info("load built-in module: %s", name)
+            mod = (globals()[name])
+        else:
+            logging.info("load external module: %s", name)
+            mod = getattr(importlib.import_module("modules.{}".format(name)),
+                          name)
+        modules.append((mod)(fonts, location, language, units, conf))
+    logging.info("modules loaded")
+    return modules
+
+
+def log_stats(profiler, draw_scheduler):
+    """log timing statistics
+    """
+    for line in profiler.report():
+        logging.info("stats %s", line)
+    logging.info("stats frames written: %d skipped: %d",
+                 FrameTracker.frames_written, FrameTracker.frames_skipped)
+    logging.info("stats %s", draw_scheduler.overrun_report())
+    for line in HttpClient.report():
+        logging.info("stats http %s", line)
+    info = Utils.text_surface.cache_info()
+    logging.info("stats text cache hits: %d misses: %d size: %d/%d",
+                 info.hits, info.misses, info.currsize, info.maxsize)
+
+
+def cached_geocode(cache, ttl, refresh, key, language, address, latitude,
+                   longitude):
+    """get geocode results from cache, calling the api when missing or expired
+
+    With refresh, a cached result is returned immediately and refreshed
+    in the background for the next start. An expired result is still used
+    when the api call fails.
+    """
+
+    def update():
+        results = geocode(key, language, address, latitude, longitude)
+        if results is not None:
+            cache.save(cache_key, list(results))
+        return results
+
+    cache_key = "geocode {} {} {} {}".format(address, latitude, longitude,
+                                             language)
+    results, age = cache.load(cache_key)
+    if results is None or age > ttl:
+        fresh = update()
+        if fresh is not None or results is None:
+            return fresh
+        logging.warning("geocode failed, using a result %d sec old", age)
+    elif refresh:
+        threading.Thread(target=update, daemon=True).start()
+    return tuple(results)
+
+
 def main():
     """main program
     """
@@ -191,8 +614,13 @@ def main():
     # initialize reboot flag
     reboot = False
 
-    # initialize framebuffer
+    # initialize framebuffer and scaler
     fb = None
+    scaler = None
+
+    # initialize draw scheduler and profiler
+    draw_scheduler = None
+    profiler = Profiler()
 
     try:
         # load config file
@@ -212,11 +640,19 @@ def main():
                                     fallback=True)
         trans.install()
 
+        # initialize cache
+        cache = Cache(config.get("cache_dir", "{}/cache".format(sys.path[0])))
+        IconCache.directory = os.path.join(cache.directory, "icons")
+        MoonIcons.directory = cache.directory
+
         # initialize address, latitude and longitude
         if "google_api_key" in config and config["google_api_key"]:
-            results = geocode(config["google_api_key"], language,
-                              config["address"], config["latitude"],
-                              config["longitude"])
+            results = cached_geocode(cache,
+                                     config.get("geocode_ttl", 30 * 86400),
+                                     config.get("geocode_refresh", False),
+                                     config["google_api_key"], language,
+                                     config["address"], config["latitude"],
+                                     config["longitude"])
             if results is not None:
                 latitude, longitude, address = results
                 config["latitude"] = latitude
@@ -225,13 +661,6 @@ def main():
                 logging.info("location: %s,%s %s", latitude, longitude,
                              address)
 
-        # start weather forecast thread
-        timer_thread = RepeatedTimer(600, weather_forecast, [
-            config["openweather_appid"], config["latitude"],
-            config["longitude"], language, config["units"]
-        ])
-        timer_thread.start()
-
         # initialize pygame
         use_framebuffer = "SDL_FBDEV" in config
         scale = None
@@ -239,9 +668,10 @@ def main():
             # Headless mode: render to Surface, push pixels to /dev/fb1 via mmap
             os.environ["SDL_VIDEODRIVER"] = "dummy"
             pygame.init()
-            screen = pygame.Surface(config["display"])
+            fb = FrameBuffer(config["SDL_FBDEV"], *config["display"],
+                             double_buffer=config.get("double_buffer", False))
+            screen = fb.native_surface() or pygame.Surface(config["display"])
             display = screen
-            fb = FrameBuffer(config["SDL_FBDEV"], *config["display"])
         else:
             if "DISPLAY_NO" in config:
                 os.environ["DISPLAY"] = config["DISPLAY_NO"]
@@ -250,48 +680,68 @@ def main():
             if pygame.display.mode_ok(config["display"]):
                 display = screen = pygame.display.set_mode(config["display"])
             else:
-                display = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-                screen = pygame.Surface(config["display"])
-                display_w, display_h = display.get_size()
-                screen_w, screen_h = screen.get_size()
-                if display_w / screen_w * screen_h <= display_h:
-                    scale = (display_w, int(display_w / screen_w * screen_h))
-                else:
-                    scale = (int(display_h / screen_h * screen_w), display_h)
+                scaler = Scaler(config["display"],
+                                config.get("scale_renderer", False))
+                display = scaler.display
+                screen = scaler.surface()
+                scale = scaler.scale
         DISPLAY_SLEEP = pygame.USEREVENT + 1
         DISPLAY_WAKEUP = pygame.USEREVENT + 2
         RESTART = pygame.USEREVENT + 3
         REBOOT = pygame.USEREVENT + 4
+        EVENT_INTERVAL = 1  # seconds between pygame event checks
         logging.info("pygame initialized. screen:%s fb:%s scale:%s",
                      screen.get_size(), config.get("SDL_FBDEV"), scale)
 
         # load modules
-        location = {
-            "latitude": config["latitude"],
-            "longitude": config["longitude"],
-            "address": config["address"]
-        }
-        units = config["units"]
-        fonts = config["fonts"]
-        modules = []
-        for module in config["modules"]:
-            name = module["module"]
-            conf = module["config"]
-            if name in globals():
-                logging.info("load built-in module: %s", name)
-                mod = (globals()[name])
-            else:
-                logging.info("load external module: %s", name)
-                mod = getattr(
-                    importlib.import_module("modules.{}".format(name)), name)
-            modules.append((mod)(fonts, location, language, units, conf))
-        logging.info("modules loaded")
+        modules = load_modules(config, language)
+        IconCache.use_atlas(os.path.join(cache.directory, "icons.atlas"))
+        MoonIcons.prepare()
+
+        # start weather forecast thread, starting from the cached response
+        weather_ttl = config.get("weather_ttl", 600)
+        cache_key = "onecall {} {} {} {}".format(config["latitude"],
+                                                 config["longitude"], language,
+                                                 config["units"])
+        weather, age = cache.load(cache_key)
+        timer_thread = RepeatedTimer(
+            weather_ttl,
+            cached_weather_forecast, [
+                cache, cache_key, config["openweather_appid"],
+                config["latitude"], config["longitude"], language,
+                config["units"]
+            ],
+            delay=max(0, weather_ttl - age) if weather else 0)
+        if weather:
+            # draw without icons until they arrive, instead of waiting here
+            threading.Thread(target=IconCache.prefetch,
+                             args=(weather,),
+                             daemon=True).start()
+            timer_thread.set_result(weather)
+        timer_thread.start()
+
+        # timing statistics, dumped periodically and on SIGUSR1
+        stats_interval = config.get("stats_interval", 3600)
+        next_stats = time.time() + stats_interval
+        dump_stats = False
+
+        def request_stats(_signum, _frame):
+            nonlocal dump_stats
+            dump_stats = True
+            Scheduler.notify()
+
+        signal.signal(signal.SIGUSR1, request_stats)
 
         # main loop
+        draw_scheduler = DrawScheduler(modules)
         display_wakeup = True
+        FrameTracker.invalidate()
         last_hash_value = None
+        last_icon_generation = IconCache.generation
         running = True
         while running:
+            frame_start = time.time()
+
             # weather data check
             weather = timer_thread.get_result()
             updated = False
@@ -301,22 +751,42 @@ def main():
                     logging.info("weather data updated")
                     last_hash_value = hash_value
                     updated = True
+                if last_icon_generation != IconCache.generation:
+                    logging.info("weather icons updated")
+                    last_icon_generation = IconCache.generation
+                    updated = True
 
-            # update screen
-            for module in modules:
+            # update screen (only the modules that are due)
+            timings = []
+            for module in draw_scheduler.due(frame_start, updated):
+                start = time.perf_counter()
                 module.draw(screen, weather, updated)
-
-            # update display
-            if display_wakeup:
+                timings.append((module.__class__.__name__,
+                                time.perf_counter() - start))
+
+            # update display (only the areas modules have drawn)
+            rects = FrameTracker.pop()
+            written = display_wakeup and (rects is None or bool(rects))
+            FrameTracker.count(written)
+            if written:
+                start = time.perf_counter()
                 if fb:
-                    fb.write(screen)
+                    fb.write(screen, rects)
+                elif scaler:
+                    scaler.write(screen, rects)
                 else:
-                    if scale:
-                        display.blit(pygame.transform.scale(screen, scale), (0, 0))
-                    pygame.display.flip()
+                    if rects is None:
+                        pygame.display.flip()
+                    else:
+                        pygame.display.update(rects)
+                timings.append(("framebuffer" if fb else "flip",
+                                time.perf_counter() - start))
 
             # event check
-            for event in pygame.event.get():
+            start = time.perf_counter()
+            events = pygame.event.get()
+            timings.append(("events", time.perf_counter() - start))
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == RESTART:
@@ -329,6 +799,8 @@ def main():
                     if display_wakeup:
                         if fb:
                             fb.blank()
+                        elif scaler:
+                            scaler.blank()
                         else:
                             display.fill(pygame.Color("black"))
                             pygame.display.flip()
@@ -337,15 +809,32 @@ def main():
                     if not display_wakeup:
                         last_hash_value = None
                         display_wakeup = True
-
-            time.sleep(1)
+                        FrameTracker.invalidate()
+                        draw_scheduler.invalidate()
+                        Scheduler.notify()
+
+            draw_scheduler.finish(time.time(), timings)
+            for name, seconds in timings:
+                profiler.add(name, seconds)
+            if dump_stats or time.time() >= next_stats:
+                log_stats(profiler, draw_scheduler)
+                dump_stats = False
+                next_stats = time.time() + stats_interval
+
+            # sleep until the next module deadline, new data or an event
+            deadline = frame_start + EVENT_INTERVAL
+            if draw_scheduler.next_deadline() is not None:
+                deadline = min(deadline, draw_scheduler.next_deadline())
+            Scheduler.wait(deadline)
 
     except Exception as e:
         logging.error(e, exc_info=True)
 
     finally:
+        if draw_scheduler:
+            log_stats(profiler, draw_scheduler)
         if args.screenshot:
-            if fb:
+            if fb or scaler:
                 raw = pygame.image.tobytes(screen, "RGB")
                 Image.frombytes("RGB", screen.get_size(), raw).save(args.screenshot)
             else:
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name, wrong-import-position
+"""Headless render benchmark for WeatherPi
+
+Renders frames with the SDL dummy driver from a recorded OpenWeather
+One Call response, without network or display hardware, and reports
+frames per second, per-module draw latency and framebuffer write time.
+"""
+
+import argparse
+import gettext
+import json
+import locale
+import logging
+import os
+import sys
+import tempfile
+import time
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+import pygame
+
+import WeatherPi
+from modules.HttpClient import HttpClient
+from modules.IconCache import IconCache
+from modules.Profiler import Profiler
+from modules.WeatherModule import FrameTracker
+
+
+def main():
+    """benchmark program
+    """
+    parser = argparse.ArgumentParser(description=__file__)
+    parser.add_argument("--config",
+                        "-c",
+                        default="{}/example.480x320.config.json".format(
+                            sys.path[0]))
+    parser.add_argument("--fixture",
+                        "-f",
+                        default="{}/benchmarks/fixtures/onecall.json".format(
+                            sys.path[0]))
+    parser.add_argument("--frames", "-n", type=int, default=100)
+    parser.add_argument("--bpp", type=int, default=16, choices=[16, 32])
+    parser.add_argument("--report", "-r", default="benchmark.json")
+    parser.add_argument("--debug",
+                        "-d",
+                        action="store_const",
+                        const=True,
+                        default=False)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.CRITICAL,
+                        stream=sys.stdout,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    with open(args.fixture, "r") as f:
+        weather = json.load(f)
+    HttpClient.enabled = False
+    if not any(name.endswith(".png")
+               for name in os.listdir("{}/icons".format(sys.path[0]))):
+        print("no icons in icons/, weather icons are not drawn")
+
+    # initialize locale, gettext
+    language = config["locale"].split("_")[0]
+    try:
+        locale.setlocale(locale.LC_ALL, config["locale"])
+    except locale.Error as e:
+        print("{}: {}".format(config["locale"], e))
+    gettext.translation("messages",
+                        localedir="{}/locale".format(sys.path[0]),
+                        languages=[language],
+                        fallback=True).install()
+
+    # initialize pygame and a file backed framebuffer
+    pygame.init()
+    width, height = config["display"]
+    device = tempfile.NamedTemporaryFile(prefix="fb")
+    device.write(bytes(width * height * args.bpp // 8))
+    device.flush()
+    fb = WeatherPi.FrameBuffer(device.name,
+                               width,
+                               height,
+                               console=False,
+                               bpp=args.bpp)
+    screen = fb.native_surface() or pygame.Surface(config["display"])
+    rgb_screen = pygame.Surface(config["display"], 0, 24)
+
+    modules = WeatherPi.load_modules(config, language)
+    IconCache.prefetch(weather)
+    profiler = Profiler(window=args.frames)
+
+    # render frames, as if new data arrived every frame
+    FrameTracker.pop()
+    start = time.perf_counter()
+    for _frame in range(args.frames):
+        for module in modules:
+            with profiler.measure(module.__class__.__name__):
+                module.draw(screen, weather, True)
+        rects = FrameTracker.pop()
+        with profiler.measure("framebuffer"):
+            fb.write(screen, rects)
+    elapsed = time.perf_counter() - start
+
+    # full-frame conversion path, for surfaces not in the framebuffer format
+    rgb_screen.blit(screen, (0, 0))
+    for _frame in range(args.frames):
+        with profiler.measure("framebuffer_convert"):
+            fb.write(rgb_screen)
+
+    for module in modules:
+        module.quit()
+    fb.close()
+    device.close()
+    pygame.quit()
+
+    report = {
+        "config": os.path.basename(args.config),
+        "display": config["display"],
+        "bpp": args.bpp,
+        "frames": args.frames,
+        "seconds": elapsed,
+        "fps": args.frames / elapsed,
+        "timings_ms": {
+            name: {key: value if key == "count" else value * 1000
+                   for key, value in stat.items()}
+            for name, stat in profiler.stats().items()
+        }
+    }
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("{} {}x{} {}bpp: {} frames in {:.2f} sec ({:.1f} fps)".format(
+        report["config"], width, height, args.bpp, args.frames, elapsed,
+        report["fps"]))
+    for line in profiler.report():
+        print("  {}".format(line))
+    print("report written to {}".format(args.report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name, wrong-import-position
+"""Weather icon atlas builder for WeatherPi
+
+Packs every weather icon, resized to every icon size used by the modules
+in a config, into one raw atlas file that WeatherPi maps at startup.
+Icons are taken from the icons folder, or downloaded from OpenWeather.
+Run it again after changing the icons or the icon sizes.
+"""
+
+import argparse
+import gettext
+import json
+import logging
+import os
+import sys
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+import pygame
+
+import WeatherPi
+from modules.IconAtlas import IconAtlas
+from modules.IconCache import IconCache
+
+# built-in modules that draw weather icons, their constructors have
+# no side effects besides registering the icon sizes
+ICON_MODULES = [
+    "Weather", "WeatherForecast", "DailyWeatherForecast", "SunriseSuset"
+]
+
+
+def main():
+    """icon atlas builder program
+    """
+    parser = argparse.ArgumentParser(description=__file__)
+    parser.add_argument("--config",
+                        "-c",
+                        default="{}/config.json".format(sys.path[0]))
+    parser.add_argument("--output", "-o", default=None)
+    parser.add_argument("--debug",
+                        "-d",
+                        action="store_const",
+                        const=True,
+                        default=False)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO,
+                        stream=sys.stdout,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    cache_dir = config.get("cache_dir", "{}/cache".format(sys.path[0]))
+    IconCache.directory = os.path.join(cache_dir, "icons")
+    output = args.output or os.path.join(cache_dir, "icons.atlas")
+
+    # load the icon modules to collect the icon sizes they use
+    language = config["locale"].split("_")[0]
+    gettext.install("messages")
+    pygame.init()
+    modules = WeatherPi.load_modules(
+        dict(config,
+             modules=[
+                 module for module in config["modules"]
+                 if module["module"] in ICON_MODULES
+             ]), language)
+    for module in modules:
+        module.quit()
+    sizes = IconCache.sizes()
+
+    images = {}
+    for name in IconCache.names:
+        file = IconCache.fetch(name)
+        if file is None:
+            continue
+        for size in sizes:
+            images[(name, size)] = IconCache.resize(file, size)
+    pygame.quit()
+
+    if not images:
+        logging.error("no icons to pack")
+        sys.exit(1)
+    IconAtlas.build(output, images)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name, wrong-import-position
+"""Benchmark RGB565 conversion with and without NumPy
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+import WeatherPi
+
+SIZES = [(240, 320), (480, 320)]
+
+
+def measure(function, image, repeat):
+    """Return the average time of function(image) in milliseconds
+    """
+    function(image)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(image)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    """benchmark program
+    """
+    parser = argparse.ArgumentParser(description=__file__)
+    parser.add_argument("--repeat", "-r", type=int, default=50)
+    args = parser.parse_args()
+
+    engines = [("lookup table", lambda image: WeatherPi.rgb_to_rgb565(
+        image.tobytes()))]
+    if WeatherPi._NUMPY_AVAILABLE:
+        engines.append(("numpy", WeatherPi.FrameBuffer._to_rgb565))
+    else:
+        print("numpy is not installed, skipping numpy engine")
+
+    for size in SIZES:
+        image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+        if len({function(image) for _name, function in engines}) != 1:
+            print("{}x{}: engines disagree".format(*size))
+            sys.exit(1)
+        for name, function in engines:
+            print("{}x{} {:>12}: {:8.2f} ms".format(
+                size[0], size[1], name, measure(function, image,
+                                                args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name, wrong-import-position
+"""Benchmark blitting icons as loaded (RGBA) and converted to the surface format
+"""
+
+import argparse
+import gettext
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+import pygame
+from PIL import Image, ImageDraw
+import WeatherPi
+from modules.WeatherModule import Utils
+
+CONFIGS = ["example.240x320.config.json", "example.480x320.config.json"]
+
+
+def weather_icon(size):
+    """Return a weather icon like the OpenWeather ones, as loaded
+    """
+    image = Image.new("RGBA", (200, 200))
+    ImageDraw.Draw(image).ellipse([(40, 40), (160, 160)], fill="orange")
+    image = image.resize((size, size), Image.LANCZOS)
+    return pygame.image.fromstring(image.tobytes(), image.size, image.mode)
+
+
+def icons(modules):
+    """Return the icons the modules of a config draw in a frame
+    """
+    result = []
+    for module in modules:
+        modules.extend(getattr(module, "forecast_modules", []))
+        name = module.__class__.__name__
+        if name in ("Weather", "DailyWeatherForecast", "SunriseSuset"):
+            result.append(weather_icon(module.icon_size))
+        elif name == "MoonPhase":
+            result.append(Utils.moon_icon(15, module.icon_size))
+        elif name == "Wind":
+            result.append(
+                Utils.wind_arrow_icon(45, module.icon_size, module.step))
+    return result
+
+
+def measure(surface, sprites, repeat, flags=0):
+    """Return the average time to blit all sprites in milliseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sprite in sprites:
+            surface.blit(sprite, (0, 0), special_flags=flags)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    """benchmark program
+    """
+    parser = argparse.ArgumentParser(description=__file__)
+    parser.add_argument("--repeat", "-r", type=int, default=200)
+    args = parser.parse_args()
+
+    gettext.install("messages")
+    pygame.init()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for name in CONFIGS:
+        with open(os.path.join(root, name), "r") as f:
+            config = json.load(f)
+        modules = WeatherPi.load_modules(config, "en")
+        sprites = icons(list(modules))
+
+        # module surfaces are opaque, alpha surfaces use premultiplied blits
+        for label, surface, flags in [
+            ("opaque", pygame.Surface(config["display"]), 0),
+            ("alpha", pygame.Surface(config["display"], pygame.SRCALPHA),
+             pygame.BLEND_PREMULTIPLIED),
+        ]:
+            converted = [Utils.sprite(sprite, surface) for sprite in sprites]
+            before = measure(surface, sprites, args.repeat)
+            after = measure(surface, converted, args.repeat, flags)
+            print("{}x{} {:>6}: {} icons  RGBA {:6.3f} ms  converted {:6.3f} ms"
+                  "  ({:.1f}x)".format(*config["display"], label, len(sprites),
+                                       before, after, before / after))
+        for module in modules:
+            module.quit()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
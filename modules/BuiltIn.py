@@ -5,12 +5,15 @@
 import datetime
 import logging
 import time
+from modules.IconCache import IconCache
+from modules.MoonIcons import MoonIcons
 from modules.WeatherModule import WeatherModule, Utils
 
 
 class Alerts(WeatherModule):
     """Any severe weather alerts pertinent
     """
+    interval = None
 
     def draw(self, screen, weather, updated):
         if weather is None:
@@ -21,10 +24,7 @@ class Alerts(WeatherModule):
         self.clear_surface()
         if message:
             logging.info("%s: %s", __class__.__name__, message)
-            for size in ("large", "medium", "small"):
-                width, height = self.text_size(message, size, bold=True)
-                if width <= self.rect.width and height <= self.rect.height:
-                    break
+            (size, _lines) = self.fit_text(message, bold=True)
             self.draw_text(message, (0, 0),
                            size,
                            "red",
@@ -36,6 +36,7 @@ class Alerts(WeatherModule):
 class Clock(WeatherModule):
     """Current Date and Time
     """
+    interval = 1
 
     def draw(self, screen, weather, updated):
         timestamp = time.time()
@@ -56,6 +57,7 @@ class Clock(WeatherModule):
 class Location(WeatherModule):
     """Current Location
     """
+    interval = None
 
     def draw(self, screen, weather, updated):
         if not self.location["address"]:
@@ -64,11 +66,8 @@ class Location(WeatherModule):
         message = self.location["address"]
 
         self.clear_surface()
-        for size in ("large", "medium", "small"):
-            width, height = self.text_size(message, size)
-            if width <= self.rect.width and height <= self.rect.height:
-                break
-        if width > self.rect.width:
+        (size, _lines) = self.fit_text(message)
+        if self.text_size(message, size)[0] > self.rect.width:
             message = message.split(",")[0]
         self.draw_text(message, (0, 0), size, "white", align="right")
         self.update_screen(screen)
@@ -77,10 +76,12 @@ class Location(WeatherModule):
 class Weather(WeatherModule):
     """Current Weather
     """
+    interval = None
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.icon_size = config["icon_size"] if "icon_size" in config else 100
+        IconCache.register(self.icon_size)
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
@@ -114,7 +115,7 @@ class Weather(WeatherModule):
         uv_index = str(uv_index)
         pressure = Utils.pressure_text(int(pressure))
 
-        text_x = weather_icon.get_size()[0]
+        text_x = weather_icon.get_size()[0] if weather_icon else self.icon_size
         text_width = self.rect.width - text_x
 
         message1 = self.text_warp("{} {}".format(temperature, short_summary),
@@ -161,11 +162,21 @@ class Weather(WeatherModule):
 class DailyWeatherForecast(WeatherModule):
     """Daily weather forecast
     """
+    interval = None
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.icon_size = config["icon_size"]
         self.day = config["day"]
+        self.day_of_week = None
+        IconCache.register(self.icon_size)
+
+    def draw_static(self):
+        self.draw_text(self.day_of_week, (0, 0),
+                       "small",
+                       "orange",
+                       align="center")
+        return True
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
@@ -178,6 +189,9 @@ class DailyWeatherForecast(WeatherModule):
 
         weather_icon = Utils.weather_icon(icon, self.icon_size)
         day_of_week = Utils.strftime(daily["dt"], "%a")
+        if day_of_week != self.day_of_week:
+            self.day_of_week = day_of_week
+            self.invalidate_static()
         temperature_low = Utils.temperature_text(int(temperature_low),
                                                  self.units)
         temperature_high = Utils.temperature_text(int(temperature_high),
@@ -185,7 +199,6 @@ class DailyWeatherForecast(WeatherModule):
         message = "{}-{}".format(temperature_low, temperature_high)
 
         self.clear_surface()
-        self.draw_text(day_of_week, (0, 0), "small", "orange", align="center")
         self.draw_text(message, (0, 15), "small", "gray", align="center")
         self.draw_image(weather_icon,
                         ((self.rect.width - self.icon_size) / 2, 30 +
@@ -196,6 +209,7 @@ class DailyWeatherForecast(WeatherModule):
 class WeatherForecast(WeatherModule):
     """Weather Forecast
     """
+    interval = None
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
@@ -224,10 +238,18 @@ class WeatherForecast(WeatherModule):
 class SunriseSuset(WeatherModule):
     """Sunrise, Sunset time
     """
+    interval = None
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.icon_size = config["icon_size"] if "icon_size" in config else 40
+        IconCache.register(self.icon_size, ("01d",))
+
+    def draw_static(self):
+        sun_icon = Utils.weather_icon("01d", self.icon_size)
+        self.draw_image(sun_icon, ((self.rect.width - self.icon_size) / 2,
+                                   (self.rect.height - self.icon_size) / 2))
+        return sun_icon is not None
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
@@ -239,11 +261,8 @@ class SunriseSuset(WeatherModule):
 
         surise = "{} \u2197".format(Utils.strftime(sunrise, "%H:%M"))
         sunset = "\u2198 {}".format(Utils.strftime(sunset, "%H:%M"))
-        sun_icon = Utils.weather_icon("01d", self.icon_size)
 
         self.clear_surface()
-        self.draw_image(sun_icon, ((self.rect.width - self.icon_size) / 2,
-                                   (self.rect.height - self.icon_size) / 2))
         self.draw_text(surise, (0, 5), "small", "white", align="center")
         self.draw_text(sunset, (0, self.rect.height - 20),
                        "small",
@@ -255,10 +274,12 @@ class SunriseSuset(WeatherModule):
 class MoonPhase(WeatherModule):
     """Moon Phase
     """
+    interval = None
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.icon_size = config["icon_size"] if "icon_size" in config else 50
+        MoonIcons.register(self.icon_size)
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
@@ -285,10 +306,15 @@ class MoonPhase(WeatherModule):
 class Wind(WeatherModule):
     """Wind direction, speed
     """
+    interval = None
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.icon_size = config["icon_size"] if "icon_size" in config else 30
+        self.step = config["step"] if "step" in config else 5
+
+        # pre-render the arrows of all directions
+        Utils.wind_arrow_icons(self.icon_size, self.step)
 
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
@@ -298,7 +324,8 @@ class Wind(WeatherModule):
         wind_speed = daily["wind_speed"]
         wind_deg = daily["wind_deg"]
 
-        wind_icon = Utils.wind_arrow_icon(wind_deg, self.icon_size)
+        wind_icon = Utils.wind_arrow_icon(wind_deg, self.icon_size,
+                                          self.step)
         wind_speed = Utils.speed_text(wind_speed, self.units)
         wind_deg = Utils.wind_bearing_text(wind_deg)
 
@@ -0,0 +1,47 @@
+# pylint: disable=invalid-name
+"""Persistent cache class
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+
+class Cache:
+    """Persistent on-disk cache of JSON data with the time it was saved
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, key):
+        """Return the cache file name of key
+        """
+        name = hashlib.md5(str(key).encode()).hexdigest()
+        return os.path.join(self.directory, "{}.json".format(name))
+
+    def load(self, key):
+        """Return (data, age in seconds), or (None, None) if missing
+        """
+        try:
+            with open(self.path(key), "r") as f:
+                entry = json.load(f)
+            age = time.time() - entry["timestamp"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+        logging.info("%s loaded from cache (%d sec old)", key, age)
+        return entry["data"], age
+
+    def save(self, key, data):
+        """Save data to the cache
+        """
+        file = self.path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(file + ".tmp", "w") as f:
+                json.dump({"key": key, "timestamp": time.time(), "data": data}, f)
+            os.replace(file + ".tmp", file)
+        except (OSError, TypeError) as e:
+            logging.error("cache %s: %s", key, e)
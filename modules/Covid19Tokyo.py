@@ -3,8 +3,10 @@
 """
 
 import datetime
+import io
 import logging
 import pandas as pd
+from modules.HttpClient import HttpClient
 from modules.WeatherModule import WeatherModule
 from modules.GraphUtils import GraphUtils
 
@@ -23,6 +25,7 @@ class Covid19Tokyo(WeatherModule):
       }
      }
     """
+    interval = None
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
         self.days_ago = config["days_ago"] if "days_ago" in config else 0
@@ -33,8 +36,11 @@ class Covid19Tokyo(WeatherModule):
 
         try:
             # Retrieve the data
-            df = pd.read_csv(("https://stopcovid19.metro.tokyo.lg.jp"
-                              "/data/130001_tokyo_covid19_patients.csv"))
+            response = HttpClient.get(
+                ("https://stopcovid19.metro.tokyo.lg.jp"
+                 "/data/130001_tokyo_covid19_patients.csv"))
+            response.raise_for_status()
+            df = pd.read_csv(io.BytesIO(response.content))
             df["公表_年月日"] = pd.to_datetime(df["公表_年月日"])
             df["人数"] = 1
             new_cases = pd.DataFrame(df.groupby("公表_年月日").sum()["人数"])
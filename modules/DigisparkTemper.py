@@ -105,28 +105,17 @@ class DigisparkTemper(TemperatureModule):
             self.units)
         humidity = Utils.percentage_text(humidity)
 
-        for size in ("large", "medium", "small"):
-            # Horizontal
-            message1 = "{}  {}".format(temperature, humidity)
-            message2 = None
-            w, h = self.text_size(message1, size, bold=True)
-            if w <= self.rect.width and 20 + h <= self.rect.height:
-                break
-
-            # Vertical
-            message1 = temperature
-            message2 = humidity if humidity else None
-            w1, h1 = self.text_size(message1, size, bold=True)
-            w2, h2 = self.text_size(message2, size, bold=True)
-            if max(w1,
-                   w2) <= self.rect.width and 20 + h1 + h2 <= self.rect.height:
-                break
+        (size, messages) = self.fit_text(temperature,
+                                         humidity,
+                                         bold=True,
+                                         top=20,
+                                         separator="  ")
 
         self.clear_surface()
-        self.draw_text(_("Indoor"), (0, 0), "small", "gray")
-        (w, h) = self.draw_text(message1, (0, 20), size, color, bold=True)
-        if message2:
-            self.draw_text(message2, (0, 20 + h), size, color, bold=True)
+        y = 20
+        for message in messages:
+            (_w, h) = self.draw_text(message, (0, y), size, color, bold=True)
+            y += h
         self.update_screen(screen)
 
         # draw the graph if necessary
@@ -2,16 +2,17 @@
 """ Glaph utility class
 """
 
-import io
 import logging
 import threading
 import time
-import numpy as np
 import pygame
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib import font_manager
-from matplotlib.dates import DateFormatter, DayLocator, HourLocator
+from matplotlib.dates import (AutoDateLocator, DateFormatter, DayLocator,
+                              HourLocator)
+from matplotlib.ticker import NullLocator
+from modules.WeatherModule import FrameTracker
 
 # matplotlib parameters
 matplotlib.pyplot.switch_backend("Agg")
@@ -38,52 +39,118 @@ def synchronized(wrapped):
     return decorator
 
 
+class _Graph:
+    """A 2-axis graph figure kept alive between updates
+
+    The lines are animated artists: a full draw renders everything else,
+    and is only needed when the axes change (limits, ticks, layout).
+    Otherwise the saved background is restored and only the lines are
+    drawn again. The title may change with the data, so it is set by
+    update() too.
+    """
+
+    def __init__(self, rect, times, y1, ylabel1, y2, ylabel2, yscale1,
+                 yscale2):
+        self.fig, self.ax1 = plt.subplots(figsize=(rect.width / dpi,
+                                                   rect.height / dpi))
+        self.ax2 = None
+        self.lines = []
+        self.span = None
+        self.view = None
+        self.background = None
+        self.title = None
+        self.settings = (ylabel1, ylabel2, yscale1, yscale2, y1 is None, y2
+                         is None)
+        if y1 is not None:
+            if ylabel1:
+                self.ax1.yaxis.label.set_color(colormap(0))
+                self.ax1.set_ylabel(ylabel1)
+            if yscale1:
+                self.ax1.set_yscale(yscale1)
+            self.lines.append(
+                self.ax1.plot(times, y1, color=colormap(0), animated=True)[0])
+        if y2 is not None:
+            self.ax2 = self.ax1.twinx()
+            if ylabel2:
+                self.ax2.yaxis.label.set_color(colormap(1))
+                self.ax2.set_ylabel(ylabel2)
+            if yscale2:
+                self.ax2.set_yscale(yscale2)
+            self.lines.append(
+                self.ax2.plot(times, y2, color=colormap(1), animated=True)[0])
+        self.ax1.xaxis.set_major_formatter(DateFormatter("%m-%d"))
+
+    def update(self, times, y1, y2, title):
+        """Update the line data and title, return the graph as a pygame image
+        """
+        if title != self.title:
+            self.title = title
+            self.ax1.set_title(title or "")
+            self.view = None
+
+        axes = [self.ax1] if y1 is not None else []
+        if y2 is not None:
+            axes.append(self.ax2)
+        for line, ax, y in zip(self.lines, axes,
+                               [y for y in (y1, y2) if y is not None]):
+            line.set_data(times, y)
+            ax.relim()
+            ax.autoscale_view()
+
+        # setting tics
+        span = (max(times) - min(times)).days
+        if span != self.span:
+            self.span = span
+            if span <= 7:
+                if span > 1:
+                    self.ax1.xaxis.set_major_locator(DayLocator())
+                    self.ax1.xaxis.set_minor_locator(HourLocator(interval=6))
+                else:
+                    self.ax1.xaxis.set_major_locator(HourLocator(interval=24))
+                    self.ax1.xaxis.set_minor_locator(HourLocator(interval=6))
+            else:
+                self.ax1.xaxis.set_major_locator(AutoDateLocator())
+                self.ax1.xaxis.set_minor_locator(NullLocator())
+            self.view = None
+
+        # full draw only when the axes changed
+        canvas = self.fig.canvas
+        view = tuple(ax.viewLim.bounds for ax in axes)
+        if view != self.view:
+            self.view = view
+            self.fig.tight_layout()
+            canvas.draw()
+            self.background = canvas.copy_from_bbox(self.fig.bbox)
+        else:
+            canvas.restore_region(self.background)
+        for line in self.lines:
+            line.axes.draw_artist(line)
+
+        return pygame.image.frombuffer(canvas.buffer_rgba(),
+                                       canvas.get_width_height(), "RGBA")
+
+
+# graphs by rect
+_graphs = {}
+
+
 @synchronized
 def _draw_2axis_graph(screen, surface, rect, times, y1, ylabel1, y2, ylabel2,
                       title, yscale1, yscale2):
-    # plot graph
-    fig, ax1 = plt.subplots(figsize=(rect.width / dpi, rect.height / dpi))
-    if title:
-        plt.title(title)
-    if y1 is not None:
-        if ylabel1:
-            ax1.yaxis.label.set_color(colormap(0))
-            ax1.set_ylabel(ylabel1)
-        if yscale1:
-            ax1.set_yscale(yscale1)
-        if sum(x is not np.nan for x in y1) > 0:
-            ax1.plot(times, y1, color=colormap(0))
-    if y2 is not None:
-        ax2 = ax1.twinx()
-        if ylabel2:
-            ax2.yaxis.label.set_color(colormap(1))
-            ax2.set_ylabel(ylabel2)
-        if yscale2:
-            ax2.set_yscale(yscale2)
-        if sum(x is not np.nan for x in y2) > 0:
-            ax2.plot(times, y2, color=colormap(1))
-
-    # setting tics
-    ax1.xaxis.set_major_formatter(DateFormatter("%m-%d"))
-    if (max(times) - min(times)).days <= 7:
-        if (max(times) - min(times)).days > 1:
-            ax1.xaxis.set_major_locator(DayLocator())
-            ax1.xaxis.set_minor_locator(HourLocator(interval=6))
-        else:
-            ax1.xaxis.set_major_locator(HourLocator(interval=24))
-            ax1.xaxis.set_minor_locator(HourLocator(interval=6))
-
-    # convert to pygame image
-    f = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(f, format="png")
-    plt.close(fig)
-    f.seek(0)
-    image = pygame.image.load(f)
+    key = tuple(rect)
+    settings = (ylabel1, ylabel2, yscale1, yscale2, y1 is None, y2 is None)
+    graph = _graphs.get(key)
+    if graph is None or graph.settings != settings:
+        if graph is not None:
+            plt.close(graph.fig)
+        graph = _graphs[key] = _Graph(rect, times, y1, ylabel1, y2, ylabel2,
+                                      yscale1, yscale2)
+    image = graph.update(times, y1, y2, title)
 
     # draw image
     surface.blit(image, (0, 0))
     screen.blit(surface, (rect.left, rect.top))
+    FrameTracker.add(rect)
 
 
 class GraphUtils:
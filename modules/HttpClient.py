@@ -0,0 +1,97 @@
+# pylint: disable=invalid-name
+"""Shared HTTP client
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from modules.Profiler import Profiler
+
+
+class HttpClient:
+    """HTTP client shared by all network fetchers
+
+    One requests.Session with connection pooling and keep-alive, so
+    repeated requests to the same host skip the TCP and TLS handshake.
+    Responses are gzip compressed when the server supports it, failed
+    requests are retried with backoff, and every request gets a per-host
+    timeout. Request counts and latency are kept per host.
+    """
+    # (connect, read) timeout in seconds
+    default_timeout = (5, 15)
+    timeouts = {
+        "api.openweathermap.org": (5, 15),
+        "openweathermap.org": (5, 10),
+        "maps.googleapis.com": (5, 10),
+        "api.nature.global": (5, 10),
+        "www.data.jma.go.jp": (5, 20),
+    }
+    retry = Retry(total=3,
+                  backoff_factor=0.5,
+                  status_forcelist=[429, 500, 502, 503, 504])
+    enabled = True
+
+    _session = None
+    _lock = threading.Lock()
+    request_counts = {}
+    error_counts = {}
+    profiler = Profiler(window=100)
+
+    @staticmethod
+    def session():
+        """Return the shared session
+        """
+        with HttpClient._lock:
+            if HttpClient._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8,
+                                      pool_maxsize=4,
+                                      max_retries=HttpClient.retry)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["Accept-Encoding"] = "gzip, deflate"
+                HttpClient._session = session
+            return HttpClient._session
+
+    @staticmethod
+    def get(url, **kwargs):
+        """Send a GET request, like requests.get
+        """
+        host = urlparse(url).hostname
+        if not HttpClient.enabled:
+            raise requests.ConnectionError(
+                "network access disabled: {}".format(url))
+        kwargs.setdefault(
+            "timeout", HttpClient.timeouts.get(host,
+                                               HttpClient.default_timeout))
+
+        start = time.perf_counter()
+        with HttpClient._lock:
+            HttpClient.request_counts[host] = \
+                HttpClient.request_counts.get(host, 0) + 1
+        try:
+            return HttpClient.session().get(url, **kwargs)
+        except requests.RequestException:
+            with HttpClient._lock:
+                HttpClient.error_counts[host] = \
+                    HttpClient.error_counts.get(host, 0) + 1
+            raise
+        finally:
+            HttpClient.profiler.add(host, time.perf_counter() - start)
+
+    @staticmethod
+    def report():
+        """Return the per-host statistics as text lines
+        """
+        stats = HttpClient.profiler.stats()
+        return [
+            "{}: requests={} errors={} p50={:.0f}ms p95={:.0f}ms max={:.0f}ms".
+            format(host, count, HttpClient.error_counts.get(host, 0),
+                   stats[host]["p50"] * 1000, stats[host]["p95"] * 1000,
+                   stats[host]["max"] * 1000)
+            for host, count in sorted(HttpClient.request_counts.items())
+            if host in stats
+        ]
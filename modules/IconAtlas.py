@@ -0,0 +1,99 @@
+# pylint: disable=invalid-name
+"""Weather icon atlas class
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import pygame
+from PIL import Image
+
+# file header: magic, header length, atlas width, atlas height
+HEADER = struct.Struct("<4sIII")
+MAGIC = b"WPIA"
+PAGE_SIZE = mmap.PAGESIZE
+
+
+class IconAtlas:
+    """Resized weather icons packed into one raw RGBA image file
+
+    build() packs PIL images into shelves and writes a JSON index followed
+    by the raw pixels, page aligned. load() maps the file and returns
+    subsurfaces of one surface backed by the mapping, so no image is
+    decoded or resampled at startup and all icons share one block of
+    memory.
+    """
+    max_width = 2048
+
+    @staticmethod
+    def build(file, images):
+        """Write {(name, size): PIL image} to an atlas file
+        """
+        # shelf packing, tallest first
+        keys = sorted(images,
+                      key=lambda key: (-images[key].size[1], key[1], key[0]))
+        index = {}
+        (x, y, shelf_height, width) = (0, 0, 0, 0)
+        for key in keys:
+            (w, h) = images[key].size
+            if x + w > IconAtlas.max_width:
+                (x, y, shelf_height) = (0, y + shelf_height, 0)
+            index["{} {}".format(*key)] = [x, y, w, h]
+            x += w
+            shelf_height = max(shelf_height, h)
+            width = max(width, x)
+        height = y + shelf_height
+
+        atlas = Image.new("RGBA", (max(width, 1), max(height, 1)))
+        for key in keys:
+            (x, y, _w, _h) = index["{} {}".format(*key)]
+            atlas.paste(images[key].convert("RGBA"), (x, y))
+
+        header = json.dumps({"icons": index}).encode()
+        offset = -(-(HEADER.size + len(header)) // PAGE_SIZE) * PAGE_SIZE
+        os.makedirs(os.path.dirname(os.path.abspath(file)), exist_ok=True)
+        with open(file + ".tmp", "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(header), *atlas.size))
+            f.write(header)
+            f.write(bytes(offset - HEADER.size - len(header)))
+            f.write(atlas.tobytes())
+        os.replace(file + ".tmp", file)
+        logging.info("icon atlas %s: %d icons %dx%d", file, len(index),
+                     *atlas.size)
+
+    @staticmethod
+    def load(file):
+        """Return {(name, size): surface} from an atlas file, or {}
+        """
+        try:
+            with open(file, "rb") as f:
+                (magic, length, width,
+                 height) = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC:
+                    raise ValueError("not an icon atlas")
+                index = json.loads(f.read(length).decode())["icons"]
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logging.warning("icon atlas %s: %s", file, e)
+            return {}
+
+        offset = -(-(HEADER.size + length) // PAGE_SIZE) * PAGE_SIZE
+        if len(data) < offset + width * height * 4:
+            logging.warning("icon atlas %s: truncated", file)
+            return {}
+
+        # the surface keeps the mapping alive as long as an icon is in use,
+        # copy-on-write so drawing on an icon never touches the file
+        surface = pygame.image.frombuffer(
+            memoryview(data)[offset:offset + width * height * 4],
+            (width, height), "RGBA")
+        icons = {}
+        for key, rect in index.items():
+            (name, size) = key.rsplit(" ", 1)
+            icons[(name, int(size))] = surface.subsurface(rect)
+        logging.info("icon atlas %s: %d icons loaded", file, len(icons))
+        return icons
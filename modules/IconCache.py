@@ -0,0 +1,197 @@
+# pylint: disable=invalid-name, broad-except
+"""Weather icon cache class
+"""
+
+import io
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from PIL import Image
+from modules.HttpClient import HttpClient
+from modules.IconAtlas import IconAtlas
+from modules.Scheduler import Scheduler
+
+
+class IconCache:
+    """Weather icons prefetched in the background and kept in memory
+
+    After each weather update, prefetch() downloads the icons referenced
+    by the data that are not on disk yet and resizes them to every size
+    registered by the modules, so get() never touches disk or network.
+    Icons in the icons folder take precedence over downloaded ones.
+    Icons found in a prebuilt atlas are used as they are.
+    Icons that fail to download are retried after retry_interval.
+    generation counts the prefetches that added icons, so the main loop
+    can redraw the modules that drew without them.
+    """
+    directory = "{}/cache/icons".format(sys.path[0])
+    names = [
+        "{:02d}{}".format(code, time) for code in [1, 2, 3, 4, 9, 10, 11, 13, 50]
+        for time in "dn"
+    ]
+    workers = 4
+    retry_interval = 60
+    generation = 0
+
+    _lock = threading.Lock()
+    _prefetch_lock = threading.Lock()
+    _icons = {}
+    _sizes = set()
+    _missed = set()
+    _retry = None
+
+    @staticmethod
+    def register(size, names=()):
+        """Register an icon size (and icons always needed in that size)
+        """
+        with IconCache._lock:
+            IconCache._sizes.add(size)
+            IconCache._missed.update((name, size) for name in names)
+
+    @staticmethod
+    def sizes():
+        """Return the registered icon sizes
+        """
+        with IconCache._lock:
+            return sorted(IconCache._sizes)
+
+    @staticmethod
+    def use_atlas(file):
+        """Use the icons in an atlas file built by WeatherPiIconAtlas.py
+        """
+        icons = IconAtlas.load(file)
+        with IconCache._lock:
+            IconCache._icons.update(icons)
+
+    @staticmethod
+    def get(name, size):
+        """Return a prefetched icon, or None if it is not in memory yet
+        """
+        with IconCache._lock:
+            icon = IconCache._icons.get((name, size))
+            if icon is None:
+                IconCache._missed.add((name, size))
+        return icon
+
+    @staticmethod
+    def icon_names(weather):
+        """Return the icon names referenced in weather data
+        """
+        names = set()
+        blocks = [weather.get("current", {})] + weather.get(
+            "hourly", []) + weather.get("daily", [])
+        for block in blocks:
+            for condition in block.get("weather", []):
+                if "icon" in condition:
+                    names.add(condition["icon"])
+        return names
+
+    @staticmethod
+    def prefetch(weather):
+        """Download and resize all icons referenced in weather data
+        """
+        with IconCache._prefetch_lock:
+            with IconCache._lock:
+                wanted = {(name, size)
+                          for name in IconCache.icon_names(weather)
+                          for size in IconCache._sizes} | IconCache._missed
+                wanted -= set(IconCache._icons)
+                IconCache._missed = set()
+            if not wanted:
+                return
+
+            names = sorted({name for name, _size in wanted})
+            with ThreadPoolExecutor(max_workers=IconCache.workers) as executor:
+                files = dict(zip(names, executor.map(IconCache.fetch, names)))
+                icons = list(
+                    executor.map(
+                        lambda key:
+                        (key, IconCache.load(files[key[0]], key[1])), wanted))
+            loaded = {key: icon for key, icon in icons if icon is not None}
+            with IconCache._lock:
+                IconCache._icons.update(loaded)
+                IconCache._missed.update(set(wanted) - set(loaded))
+                if loaded:
+                    IconCache.generation += 1
+            logging.info("%d of %d weather icons prefetched", len(loaded),
+                         len(wanted))
+            if len(loaded) < len(wanted):
+                IconCache.schedule_retry()
+        if loaded:
+            Scheduler.notify()
+
+    @staticmethod
+    def schedule_retry():
+        """Prefetch the icons that failed again after retry_interval
+        """
+        with IconCache._lock:
+            retry = IconCache._retry
+            if retry is not None and retry.is_alive(
+            ) and retry is not threading.current_thread():
+                return
+            IconCache._retry = threading.Timer(IconCache.retry_interval,
+                                               IconCache.prefetch,
+                                               args=({},))
+            IconCache._retry.daemon = True
+            IconCache._retry.start()
+
+    @staticmethod
+    def fetch(name):
+        """Return the file of an icon, downloading it if needed
+        """
+        file = "{}/icons/{}.png".format(sys.path[0], name)
+        if os.path.isfile(file):
+            return file
+        file = os.path.join(IconCache.directory, "{}.png".format(name))
+        if os.path.isfile(file):
+            return file
+        try:
+            response = HttpClient.get(
+                "http://openweathermap.org/img/wn/{}@2x.png".format(name))
+            response.raise_for_status()
+            Image.open(io.BytesIO(response.content)).verify()
+            os.makedirs(IconCache.directory, exist_ok=True)
+            with open(file + ".tmp", "wb") as f:
+                f.write(response.content)
+            os.replace(file + ".tmp", file)
+            logging.info("weather icon %s downloaded", name)
+            return file
+
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            return None
+
+    @staticmethod
+    def resize(file, size):
+        """Open an icon file resized to size as a PIL RGBA image
+        """
+        image = Image.open(file).convert("RGBA")
+        (width, height) = image.size
+        if width >= height:
+            (width, height) = (size, int(size / width * height))
+        else:
+            (width, height) = (int(size / width * height), size)
+        return image.resize((width, height), Image.LANCZOS)
+
+    @staticmethod
+    def load(file, size):
+        """Load an icon file resized to size
+        """
+        if file is None:
+            return None
+        try:
+            image = IconCache.resize(file, size)
+
+            # convert pygame image
+            image = pygame.image.fromstring(image.tobytes(), image.size,
+                                            image.mode)
+
+            logging.debug("weather icon %s %s loaded", file, size)
+            return image
+
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            return None
@@ -4,7 +4,7 @@
 
 import logging
 from xml.etree import ElementTree as et
-import requests
+from modules.HttpClient import HttpClient
 from modules.WeatherModule import WeatherModule
 from modules.RepeatedTimer import RepeatedTimer
 
@@ -14,7 +14,7 @@ def weather_alerts(prefectures, city):
     """
 
     try:
-        response = requests.get(
+        response = HttpClient.get(
             "https://www.data.jma.go.jp/developer/xml/feed/extra.xml")
         response.raise_for_status()
 
@@ -29,7 +29,7 @@ def weather_alerts(prefectures, city):
         if not url:
             return None
 
-        response = requests.get(url)
+        response = HttpClient.get(url)
         response.raise_for_status()
 
         data = et.fromstring(response.content)
@@ -66,6 +66,7 @@ class JMAAlerts(WeatherModule):
 
     参考：http://xml.kishou.go.jp/xmlpull.html
     """
+    interval = 60
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
@@ -78,8 +79,10 @@ class JMAAlerts(WeatherModule):
             raise ValueError(__class__.__name__)
 
         # start weather alerts thread
-        self.timer_thread = RepeatedTimer(600, weather_alerts,
-                                          [self.prefectures, self.city])
+        self.timer_thread = RepeatedTimer(600,
+                                          weather_alerts,
+                                          [self.prefectures, self.city],
+                                          module=self)
         self.timer_thread.start()
 
     def quit(self):
@@ -107,10 +110,7 @@ class JMAAlerts(WeatherModule):
                 color = "yellow"
             else:
                 color = "white"
-            for size in ("large", "medium", "small"):
-                w, h = self.text_size(message, size, bold=True)
-                if w <= self.rect.width and h <= self.rect.height:
-                    break
+            (size, _lines) = self.fit_text(message, bold=True)
             self.draw_text(message, (0, 0),
                            size,
                            color,
@@ -4,6 +4,7 @@
 
 import logging
 import socket
+import time
 from modules.WeatherModule import WeatherModule, Utils
 
 
@@ -34,9 +35,10 @@ class LocalAddress(WeatherModule):
        }
     }
     """
+    interval = 30
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
-        self.seconds = 0
+        self.connected = time.time()
         self.seconds_to_reboot = 0
         if isinstance(config["seconds_to_reboot"], int):
             self.seconds_to_reboot = config["seconds_to_reboot"]
@@ -44,20 +46,16 @@ class LocalAddress(WeatherModule):
     def draw(self, screen, weather, updated):
         message = get_local_address()
         if message:
-            self.seconds = 0
+            self.connected = time.time()
         else:
             message = "connection lost"
-            self.seconds += 1
-            logging.info("%s: %s (%d)", __class__.__name__, message,
-                         self.seconds)
-            if self.seconds_to_reboot and self.seconds > self.seconds_to_reboot:
+            seconds = time.time() - self.connected
+            logging.info("%s: %s (%d)", __class__.__name__, message, seconds)
+            if self.seconds_to_reboot and seconds > self.seconds_to_reboot:
                 Utils.reboot()
 
         self.clear_surface()
-        for size in ("large", "medium", "small"):
-            width, height = self.text_size(message, size, bold=True)
-            if width <= self.rect.width and height <= self.rect.height:
-                break
+        (size, _lines) = self.fit_text(message, bold=True)
         self.draw_text(message, (0, 0),
                        size,
                        "white",
@@ -8,11 +8,17 @@ from modules.WeatherModule import WeatherModule
 class ModuleTemplate(WeatherModule):
     """Module template
     """
+    interval = None
 
     # def __init__(self, fonts, location, language, units, config):
     #    super().__init__(fonts, location, language, units, config)
     #    # check config if needed
 
+    # def draw_static(self):
+    #    # draw captions and other parts that do not change with the data,
+    #    # clear_surface() then starts from this drawing
+    #    return True
+
     def draw(self, screen, weather, updated):
         if weather is None or not updated:
             return
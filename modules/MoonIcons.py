@@ -0,0 +1,176 @@
+# pylint: disable=invalid-name, broad-except
+"""Moon phase icon class
+"""
+
+import logging
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import pygame
+from PIL import Image, ImageDraw
+from modules.IconAtlas import IconAtlas
+
+try:
+    import numpy as np
+    _NUMPY_AVAILABLE = True
+except ImportError:
+    _NUMPY_AVAILABLE = False
+
+AGES = range(30)
+_SIZE = 200  # Create a large image and resize it
+
+
+def _shadow_spans(age):
+    """Return the start and end of the shadow on each row of a large image
+    """
+    radius = int(_SIZE / 2)
+    theta = age / 14.765 * math.pi
+    spans = []
+    for y in range(-radius, radius, 1):
+        alpha = math.acos(y / radius)
+        x = radius * math.sin(alpha)
+        length = radius * math.cos(theta) * math.sin(alpha)
+        if age < 15:
+            spans.append((radius - x + 1, radius + length + 1, x))
+        else:
+            spans.append((radius - length + 1, radius + x + 1, x))
+    return spans
+
+
+@lru_cache()
+def _disc():
+    """Return the full moon mask of a large image
+    """
+    columns = np.arange(_SIZE + 2)
+    rows = columns[:, np.newaxis]
+    center = (_SIZE + 1) / 2
+    return ((columns - center)**2 +
+            (rows - center)**2 <= (_SIZE / 2)**2).astype(np.uint8)
+
+
+def _render_numpy(age):
+    """Render a large moon image with vectorized masks
+    """
+    radius = int(_SIZE / 2)
+    theta = age / 14.765 * math.pi
+    y = np.arange(-radius, radius, dtype=np.float64)
+    x = radius * np.sqrt(1 - (y / radius)**2)
+    length = radius * math.cos(theta) * np.sqrt(1 - (y / radius)**2)
+    if age < 15:
+        (start, end) = (radius - x + 1, radius + length + 1)
+    else:
+        (start, end) = (radius - length + 1, radius + x + 1)
+
+    columns = np.arange(_SIZE + 2)
+    disc = _disc()
+    shadow = np.zeros(disc.shape, dtype=bool)
+    shadow[1:_SIZE + 1] = (
+        (columns >= np.round(np.minimum(start, end))[:, np.newaxis]) &
+        (columns <= np.round(np.maximum(start, end))[:, np.newaxis]))
+
+    # transparent, white, dimgray
+    palette = np.array([(0, 0, 0, 0), (255, 255, 255, 255),
+                        (105, 105, 105, 255)],
+                       dtype=np.uint8)
+    pixels = palette[np.where(shadow, 2, disc)]
+    return Image.fromarray(pixels, "RGBA")
+
+
+def _render_pil(age):
+    """Render a large moon image line by line
+    """
+    image = Image.new("RGBA", (_SIZE + 2, _SIZE + 2))
+    draw = ImageDraw.Draw(image)
+
+    # draw full moon
+    draw.ellipse([(1, 1), (_SIZE, _SIZE)], fill="white")
+
+    # draw shadow
+    radius = int(_SIZE / 2)
+    for (y, (start, end, _x)) in zip(range(-radius, radius, 1),
+                                     _shadow_spans(age)):
+        draw.line(((start, radius + y + 1), (end, radius + y + 1)),
+                  fill="dimgray")
+    return image
+
+
+def render(age, size):
+    """Return a moon phase image as RGBA bytes, in a worker process
+    """
+    image = _render_numpy(age) if _NUMPY_AVAILABLE else _render_pil(age)
+    return image.resize((size, size), Image.LANCZOS).tobytes()
+
+
+class MoonIcons:
+    """Moon phase icons for every moon age, rendered ahead of time
+
+    prepare() loads the icons of every registered size from the moon
+    atlas in the cache directory, renders the missing ones in a process
+    pool and saves them back, so later boots only map the atlas.
+    """
+    directory = "{}/cache".format(sys.path[0])
+
+    _lock = threading.Lock()
+    _icons = {}
+    _sizes = set()
+
+    @staticmethod
+    def register(size):
+        """Register an icon size
+        """
+        with MoonIcons._lock:
+            MoonIcons._sizes.add(size)
+
+    @staticmethod
+    def prepare():
+        """Load or render the icons of all moon ages in registered sizes
+        """
+        file = os.path.join(MoonIcons.directory, "moon.atlas")
+        icons = {(int(name[4:]), size): icon
+                 for (name, size), icon in IconAtlas.load(file).items()
+                 if name.startswith("moon")}
+        missing = [(age, size) for size in sorted(MoonIcons._sizes)
+                   for age in AGES if (age, size) not in icons]
+        if missing:
+            try:
+                workers = os.cpu_count() or 1
+                if workers > 1:
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        images = list(executor.map(render, *zip(*missing)))
+                else:
+                    images = [render(age, size) for age, size in missing]
+            except Exception as e:
+                logging.error(e, exc_info=True)
+                images = [render(age, size) for age, size in missing]
+            for (age, size), image in zip(missing, images):
+                icons[(age, size)] = pygame.image.fromstring(
+                    image, (size, size), "RGBA")
+            IconAtlas.build(
+                file, {("moon{}".format(age), size): Image.frombytes(
+                    "RGBA", (size, size),
+                    pygame.image.tostring(icon, "RGBA"))
+                       for (age, size), icon in icons.items()})
+            logging.info("%d moon phase icons rendered", len(missing))
+        with MoonIcons._lock:
+            MoonIcons._icons.update(icons)
+
+    @staticmethod
+    def get(age, size):
+        """Return a moon phase icon, rendering it if not prepared
+        """
+        with MoonIcons._lock:
+            icon = MoonIcons._icons.get((age, size))
+        if icon is None:
+            icon = pygame.image.fromstring(render(age, size), (size, size),
+                                           "RGBA")
+            with MoonIcons._lock:
+                MoonIcons._icons[(age, size)] = icon
+
+        spans = _shadow_spans(age)
+        logging.info("moon phase age: %s parcentage: %s", age,
+                     round(100 - sum(end - start for start, end, _x in spans) /
+                           sum(2 * x for _start, _end, x in spans) * 100, 1))
+        return icon
@@ -3,6 +3,7 @@
 """
 
 import logging
+import time
 import RPi.GPIO as GPIO
 from modules.WeatherModule import WeatherModule, Utils
 
@@ -26,7 +27,7 @@ class PIR(WeatherModule):
     def __init__(self, fonts, location, language, units, config):
         self.pin = None
         self.power_save_delay = None
-        self.power_save_timer = 0
+        self.last_motion = time.time()
 
         if isinstance(config["pin"], int):
             self.pin = config["pin"]
@@ -41,9 +42,7 @@ class PIR(WeatherModule):
     def draw(self, screen, weather, updated):
         if GPIO.input(self.pin):
             Utils.display_wakeup()
-            self.power_save_timer = 0
-        else:
-            self.power_save_timer += 1
-            if self.power_save_timer > self.power_save_delay:
-                logging.info("%s: screen sleep.", __class__.__name__)
-                Utils.display_sleep()
+            self.last_motion = time.time()
+        elif time.time() - self.last_motion > self.power_save_delay:
+            logging.info("%s: screen sleep.", __class__.__name__)
+            Utils.display_sleep()
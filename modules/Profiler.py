@@ -0,0 +1,63 @@
+# pylint: disable=invalid-name
+"""Profiler class
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+
+class Profiler:
+    """Rolling timing statistics of named steps
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.samples = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds):
+        """Record the time a step took
+        """
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = collections.deque(maxlen=self.window)
+            self.samples[name].append(seconds)
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        """Measure the time spent in a with block
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def stats(self):
+        """Return {name: {"count", "p50", "p95", "max"}} in seconds
+        """
+
+        def percentile(values, p):
+            return values[int(round(p / 100 * (len(values) - 1)))]
+
+        with self.lock:
+            samples = [(name, sorted(values))
+                       for name, values in self.samples.items()]
+        return collections.OrderedDict(
+            (name, {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "max": values[-1]
+            }) for name, values in samples if values)
+
+    def report(self):
+        """Return the statistics as text lines
+        """
+        return [
+            "{}: n={} p50={:.1f}ms p95={:.1f}ms max={:.1f}ms".format(
+                name, stat["count"], stat["p50"] * 1000, stat["p95"] * 1000,
+                stat["max"] * 1000) for name, stat in self.stats().items()
+        ]
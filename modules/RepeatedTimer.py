@@ -5,16 +5,29 @@
 import hashlib
 import logging
 import threading
+from modules.Scheduler import Scheduler
 
 
 class RepeatedTimer(threading.Timer):
     """Thread that executes every N seconds
+
+    When the result changes the main loop is woken, and the module given
+    as module is drawn in the next frame.
     """
 
-    def __init__(self, interval, function, args=None, kwargs=None):
+    def __init__(self,
+                 interval,
+                 function,
+                 args=None,
+                 kwargs=None,
+                 *,
+                 delay=0,
+                 module=None):
         super().__init__(interval, self.run, args, kwargs)
         self.thread = None
         self.function = function
+        self.delay = delay
+        self.module = module
         self._return = None
         self._hash_value = None
         logging.info("%s thread created. interval: %s", self.function.__name__,
@@ -23,10 +36,22 @@ class RepeatedTimer(threading.Timer):
     def run(self):
         """start thread
         """
-        self.thread = threading.Timer(self.interval, self.run)
+        delay, self.delay = self.delay, 0
+        self.thread = threading.Timer(delay or self.interval, self.run)
         self.thread.start()
+        if delay:
+            return
         self._return = self.function(*self.args, **self.kwargs)
-        self._hash_value = hashlib.md5(str(self._return).encode()).hexdigest()
+        hash_value = hashlib.md5(str(self._return).encode()).hexdigest()
+        if self._hash_value != hash_value:
+            self._hash_value = hash_value
+            Scheduler.notify(self.module)
+
+    def set_result(self, result):
+        """set return value, e.g. restored from a cache
+        """
+        self._return = result
+        self._hash_value = hashlib.md5(str(result).encode()).hexdigest()
 
     def get_result(self):
         """get return value
@@ -0,0 +1,127 @@
+# pylint: disable=invalid-name
+"""Scheduler class
+"""
+
+import logging
+import threading
+import time
+
+
+class Scheduler:
+    """Wake the main loop when new data arrives or the next deadline is reached
+    """
+    _condition = threading.Condition()
+    _notified = False
+    _modules = set()
+
+    @staticmethod
+    def notify(module=None):
+        """Wake the main loop, and draw a module whose own data has changed
+        """
+        with Scheduler._condition:
+            Scheduler._notified = True
+            if module is not None:
+                Scheduler._modules.add(module)
+            Scheduler._condition.notify_all()
+
+    @staticmethod
+    def notified_modules():
+        """Return and clear the modules notified since the last call
+        """
+        with Scheduler._condition:
+            (modules, Scheduler._modules) = (Scheduler._modules, set())
+        return modules
+
+    @staticmethod
+    def wait(deadline):
+        """Sleep until the deadline (unix time) or until notify() is called
+
+        Returns True if woken by notify().
+        """
+        with Scheduler._condition:
+            while not Scheduler._notified:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                Scheduler._condition.wait(timeout)
+            notified = Scheduler._notified
+            Scheduler._notified = False
+        return notified
+
+
+class DrawScheduler:
+    """Decide which modules have to be drawn in the current frame
+
+    A module is drawn when new data arrives, when the timer of its own
+    data notifies it, or when its interval has elapsed. Deadlines are aligned to wall-clock multiples of the interval,
+    so a 1 second module is drawn right after each second boundary.
+    Frames that finish after the next deadline are counted as overruns.
+    """
+
+    def __init__(self, modules):
+        self.next_times = [[module, 0] for module in modules]
+        self.forced = True
+        self.deadline = None
+        self.overruns = 0
+        self.overrun_time = 0
+        self.max_overrun = 0
+        self.culprits = {}
+
+    def invalidate(self):
+        """Draw all modules in the next frame
+        """
+        self.forced = True
+
+    def due(self, now, updated):
+        """Return the modules to draw and schedule their next draw
+        """
+        forced = self.forced or updated
+        self.forced = False
+        notified = Scheduler.notified_modules()
+        modules = []
+        for entry in self.next_times:
+            (module, next_time) = entry
+            if forced or module in notified or (module.interval and
+                                                next_time <= now):
+                modules.append(module)
+                if module.interval:
+                    entry[1] = (now // module.interval + 1) * module.interval
+        self.deadline = self.next_deadline()
+        return modules
+
+    def next_deadline(self):
+        """Return the time the next module is due, or None
+        """
+        times = [next_time for module, next_time in self.next_times
+                 if module.interval]
+        return min(times) if times else None
+
+    def finish(self, end, timings):
+        """Account a finished frame
+
+        Parameters
+        ----------
+        end:
+            time (unix time) the frame finished
+        timings:
+            list of (name, seconds) spent in the frame
+        """
+        if self.deadline is None or end <= self.deadline:
+            return
+        overrun = end - self.deadline
+        culprit = max(timings, key=lambda timing: timing[1])[0] \
+            if timings else "unknown"
+        self.overruns += 1
+        self.overrun_time += overrun
+        self.max_overrun = max(self.max_overrun, overrun)
+        self.culprits[culprit] = self.culprits.get(culprit, 0) + 1
+        logging.warning("frame overrun %.3f sec (slowest: %s)", overrun,
+                        culprit)
+
+    def overrun_report(self):
+        """Return a summary of the frame overruns
+        """
+        return "overruns: {} total: {:.3f} sec max: {:.3f} sec culprits: {}".format(
+            self.overruns, self.overrun_time, self.max_overrun,
+            ", ".join("{}={}".format(name, count)
+                      for name, count in sorted(self.culprits.items())))
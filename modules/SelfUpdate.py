@@ -50,6 +50,7 @@ class SelfUpdate(WeatherModule):
       }
     }
     """
+    interval = None
 
     def __init__(self, fonts, location, language, units, config):
         self.check_interval = None
@@ -53,6 +53,7 @@ class TemperatureModule(WeatherModule):
             for x in range(0, self.window_size)
         ]
         self.times.reverse()
+        self.last_minute = now.replace(second=0, microsecond=0)
         self.temperatures = [np.nan] * self.window_size
         self.humidities = [np.nan] * self.window_size
 
@@ -71,6 +72,10 @@ class TemperatureModule(WeatherModule):
             self.graph_module = TemperatureGraph(fonts, location, language,
                                                  units, config)
 
+    def draw_static(self):
+        self.draw_text(_("Indoor"), (0, 0), "small", "gray")
+        return True
+
     def start_sensor_thread(self, interval, function, args=None, kwargs=None):
         """start sensor thread
         """
@@ -91,7 +96,9 @@ class TemperatureModule(WeatherModule):
 
         # logging only once a minute
         dt = datetime.datetime.now()
-        if dt.second == 0:
+        minute = dt.replace(second=0, microsecond=0)
+        if minute != self.last_minute:
+            self.last_minute = minute
             self.times = self.times[1:] + [dt]
             if self.temperatures is not None:
                 celsius = np.nan if celsius is None else float(
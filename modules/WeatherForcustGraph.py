@@ -88,6 +88,7 @@ class WeatherForcustGraph(WeatherModule):
 
         https://openweathermap.org/api/one-call-api
     """
+    interval = None
 
     def __init__(self, fonts, location, language, units, config):
         super().__init__(fonts, location, language, units, config)
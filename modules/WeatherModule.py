@@ -3,20 +3,30 @@
 """
 
 import datetime
-import io
 import logging
 import math
-import os
-import sys
+import re
+import threading
+import weakref
 from functools import lru_cache
-import requests
 import pygame
 from PIL import Image, ImageDraw
+from modules.IconCache import IconCache
+from modules.MoonIcons import MoonIcons
+from modules.Scheduler import Scheduler
+
+# CJK text can break between any characters, other text between words
+_CJK = "\u2e80-\u2fff\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff" \
+       "\uac00-\ud7af\uf900-\ufaff\uff00-\uffef"
+_WARP_TOKENS = re.compile(r"\s+|[{0}]|[^\s{0}]+".format(_CJK))
 
 
 class Utils:
     """Utility class
     """
+    # images converted to the pixel formats they are blitted to
+    sprites = weakref.WeakKeyDictionary()
+
     color_maps = [
         # hot: red
         {
@@ -183,157 +193,339 @@ class Utils:
         return pygame.font.SysFont(name, size, bold)
 
     @staticmethod
-    @lru_cache()
-    def weather_icon(name, size):
-        """Create a weather image
-        """
-        try:
-            file = "{}/icons/{}.png".format(sys.path[0], name)
-            if os.path.isfile(file):
-                # get icons from local folder
-                image = Image.open(file)
-            else:
-                # get icons from OpenWeather
-                response = requests.get(
-                    "http://openweathermap.org/img/wn/{}@2x.png".format(name))
-                response.raise_for_status()
-                image = Image.open(io.BytesIO(response.content))
-
-            # resize icon
-            (width, height) = image.size
-            if width >= height:
-                (width, height) = (size, int(size / width * height))
-            else:
-                (width, height) = (int(size / width * height), size)
-            image = image.resize((width, height), Image.LANCZOS)
+    @lru_cache(maxsize=4096)
+    def text_width(name, size, bold, text):
+        """Return the width of a character or a word
+        """
+        return Utils.font(name, size, bold).size(text)[0]
 
-            # convert pygame image
-            image = pygame.image.fromstring(image.tobytes(), image.size,
-                                            image.mode)
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def text_warp(name, size, bold, text, line_width, max_lines):
+        """Wrap text into lines, breaking Latin text between words and
+        CJK text between any characters
+        """
+
+        lines = []
+        line = []
+        cur_width = 0
+        for token in _WARP_TOKENS.findall(text):
+            token_width = Utils.text_width(name, size, bold, token)
+            if token.isspace():
+                if line:
+                    line.append(token)
+                    cur_width += token_width
+                continue
+            if cur_width + token_width > line_width and line:
+                lines.append("".join(line).rstrip())
+                (line, cur_width) = ([], 0)
+            if token_width <= line_width:
+                line.append(token)
+                cur_width += token_width
+                continue
+            # a word longer than a line
+            for char in token:
+                char_width = Utils.text_width(name, size, bold, char)
+                if cur_width + char_width > line_width and line:
+                    lines.append("".join(line))
+                    (line, cur_width) = ([], 0)
+                line.append(char)
+                cur_width += char_width
+        if line:
+            lines.append("".join(line).rstrip())
+        if 0 < max_lines < len(lines):
+            # Put a placeholder if the text is truncated
+            lines = lines[:max_lines]
+            lines[max_lines - 1] = lines[max_lines - 1][:-2] + ".."
+        return tuple(lines)
 
-            logging.debug("weather icon %s %s loaded", name, size)
-            return image
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def fit_text(name, sizes, bold, texts, separator, width, height):
+        """Return (size, lines) of the largest font size that fits texts
+        in width x height, on one line or one text per line
+        """
+        layouts = [(separator.join(texts), )]
+        if len(texts) > 1:
+            layouts.append(texts)
+        (size, lines) = (sizes[-1][0], layouts[-1])
+        for (size, pixels) in sizes:
+            font = Utils.font(name, pixels, bold)
+            for lines in layouts:
+                extents = [font.size(line) for line in lines]
+                if max(w for w, _h in extents) <= width and sum(
+                        h for _w, h in extents) <= height:
+                    return size, lines
+        return size, lines
 
-        except Exception as e:
-            logging.error(e, exc_info=True)
-            return None
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def glyph_atlas(name, size, bold):
+        """Create a GlyphAtlas of a font
+        """
+        return GlyphAtlas(Utils.font(name, size, bold))
 
     @staticmethod
-    @lru_cache()
-    def moon_icon(age, size):
-        """Create a moon phase image
+    @lru_cache(maxsize=256)
+    def text_surface(name, size, bold, text, color, background):
+        """Render text, reusing the surface while the same text is drawn
+
+        Surfaces are shared by all modules, so they must only be blitted.
+        Hit and miss counts are available with text_surface.cache_info().
         """
-        _size = 200  # Create a large image and resize it
-        radius = int(_size / 2)
+        return Utils.font(name, size, bold).render(text, True, color,
+                                                   background)
 
-        image = Image.new("RGBA", (_size + 2, _size + 2))
-        draw = ImageDraw.Draw(image)
+    @staticmethod
+    def convert_sprite(image, target, background="black"):
+        """Convert an image to the pixel format of a target surface
 
-        # draw full moon
-        draw.ellipse([(1, 1), (_size, _size)], fill="white")
-
-        # draw shadow
-        theta = age / 14.765 * math.pi
-        sum_x = sum_length = 0
-        for y in range(-radius, radius, 1):
-            alpha = math.acos(y / radius)
-            x = radius * math.sin(alpha)
-            length = radius * math.cos(theta) * math.sin(alpha)
-            if age < 15:
-                start = (radius - x + 1, radius + y + 1)
-                end = (radius + length + 1, radius + y + 1)
-            else:
-                start = (radius - length + 1, radius + y + 1)
-                end = (radius + x + 1, radius + y + 1)
-            draw.line((start, end), fill="dimgray")
-            sum_x += 2 * x
-            sum_length += end[0] - start[0]
-
-        # resize
-        image = image.resize((size, size), Image.LANCZOS)
-
-        # convert pygame image
-        image = pygame.image.fromstring(image.tobytes(), image.size,
-                                        image.mode)
-
-        logging.info("moon phase age: %s parcentage: %s", age,
-                     round(100 - (sum_length / sum_x) * 100, 1))
-        return image
+        For opaque targets the image is composited on background, so it
+        is blitted as a plain copy. For targets with per-pixel alpha it is
+        premultiplied, to be blitted with BLEND_PREMULTIPLIED.
+        """
+        if target.get_flags() & pygame.SRCALPHA:
+            return image.convert(target).premul_alpha()
+        sprite = pygame.Surface(image.get_size(), 0, target)
+        sprite.fill(background)
+        sprite.blit(image, (0, 0))
+        return sprite
+
+    @staticmethod
+    def sprite(image, target, background="black"):
+        """Return an image converted once to the pixel format of target
+        """
+        key = (target.get_bitsize(), target.get_masks(),
+               target.get_flags() & pygame.SRCALPHA, background)
+        sprites = Utils.sprites.setdefault(image, {})
+        if key not in sprites:
+            sprites[key] = Utils.convert_sprite(image, target, background)
+        return sprites[key]
+
+    @staticmethod
+    def weather_icon(name, size):
+        """Return a weather image prefetched by IconCache
+        """
+        return IconCache.get(name, size)
+
+    @staticmethod
+    def moon_icon(age, size):
+        """Return a moon phase image rendered ahead of time by MoonIcons
+        """
+        return MoonIcons.get(age, size)
 
     @staticmethod
     @lru_cache()
-    def wind_arrow_icon(wind_deg, size):
-        """Create a wind direction allow image
+    def wind_arrow_icons(size, step=5):
+        """Create wind direction allow images for every step degrees
         """
         _size = 200  # Create a large image and resize it
         width = 0.15 * _size  # arrowhead width
         height = 0.25 * _size  # arrowhead height
 
+        # draw the arrow for 0 degree (north wind), then rotate it
         radius = _size / 2
-        angle = 90 - wind_deg
-        theta = angle / 360 * math.pi * 2
-
-        tail = (radius + radius * math.cos(theta),
-                radius - radius * math.sin(theta))
-        head = (radius + radius * math.cos(theta + math.pi),
-                radius - radius * math.sin(theta + math.pi))
-
-        base_vector = (head[0] - tail[0], head[1] - tail[1])
-        length = math.sqrt(base_vector[0]**2 + base_vector[1]**2)
-        unit_vector = (base_vector[0] / length, base_vector[1] / length)
-
-        left = (head[0] - unit_vector[1] * width - unit_vector[0] * height,
-                head[1] + unit_vector[0] * width - unit_vector[1] * height)
-        right = (head[0] + unit_vector[1] * width - unit_vector[0] * height,
-                 head[1] - unit_vector[0] * width - unit_vector[1] * height)
+        tail = (radius, 0)
+        head = (radius, _size)
+        left = (head[0] + width, head[1] - height)
+        right = (head[0] - width, head[1] - height)
 
         image = Image.new("RGBA", (_size, _size))
         draw = ImageDraw.Draw(image)
         draw.line([head, tail], fill="white", width=4)
         draw.polygon([head, left, right], fill="white")
 
-        # resize
-        image = image.resize((size, size), Image.LANCZOS)
+        # rotating at a few times the icon size is enough for antialiasing
+        if size * 4 < _size:
+            image = image.resize((size * 4, size * 4), Image.LANCZOS)
 
-        # convert pygame image
-        image = pygame.image.fromstring(image.tobytes(), image.size,
-                                        image.mode)
+        icons = []
+        for wind_deg in range(0, 360, step):
+            # rotate and resize
+            icon = image.rotate(-wind_deg, Image.BICUBIC).resize(
+                (size, size), Image.LANCZOS)
 
-        logging.info("wind degree: %s", wind_deg)
-        return image
+            # convert pygame image
+            icons.append(
+                pygame.image.fromstring(icon.tobytes(), icon.size, icon.mode))
+
+        logging.info("%d wind arrows %spxl created", len(icons), size)
+        return icons
+
+    @staticmethod
+    def wind_arrow_icon(wind_deg, size, step=5):
+        """Return a wind direction allow image, quantized to step degrees
+        """
+        icons = Utils.wind_arrow_icons(size, step)
+        return icons[int(round(wind_deg / step)) % len(icons)]
+
+    @staticmethod
+    def post_event(event_type):
+        """Post a pygame event and wake the main loop if called from another thread
+        """
+        pygame.event.post(pygame.event.Event(event_type))
+        if threading.current_thread() is not threading.main_thread():
+            Scheduler.notify()
 
     @staticmethod
     def display_sleep():
         """Send display sleep event
         """
         DISPLAY_SLEEP = pygame.USEREVENT + 1
-        pygame.event.post(pygame.event.Event(DISPLAY_SLEEP))
+        Utils.post_event(DISPLAY_SLEEP)
 
     @staticmethod
     def display_wakeup():
         """Send display wakeup event
         """
         DISPLAY_WAKEUP = pygame.USEREVENT + 2
-        pygame.event.post(pygame.event.Event(DISPLAY_WAKEUP))
+        Utils.post_event(DISPLAY_WAKEUP)
 
     @staticmethod
     def restart():
         """Send system restart event
         """
         RESTART = pygame.USEREVENT + 3
-        pygame.event.post(pygame.event.Event(RESTART))
+        Utils.post_event(RESTART)
 
     @staticmethod
     def reboot():
         """Send system reboot event
         """
         RESTART = pygame.USEREVENT + 4
-        pygame.event.post(pygame.event.Event(RESTART))
+        Utils.post_event(RESTART)
+
+
+class FrameTracker:
+    """Frame-level change tracking
+
+    Modules record the screen areas they update through update_screen().
+    The main loop writes only those areas to the display and skips the
+    output entirely when nothing changed.
+    """
+    _lock = threading.Lock()
+    _rects = []
+    _full = False
+    frames_written = 0
+    frames_skipped = 0
+
+    @staticmethod
+    def add(rect):
+        """Record a screen area that has been updated
+        """
+        with FrameTracker._lock:
+            FrameTracker._rects.append(pygame.Rect(rect))
+
+    @staticmethod
+    def invalidate():
+        """Mark the whole screen as updated
+        """
+        with FrameTracker._lock:
+            FrameTracker._full = True
+
+    @staticmethod
+    def pop():
+        """Return the screen areas updated since the last call and clear them
+
+        Returns None when the whole screen has to be updated.
+        """
+        with FrameTracker._lock:
+            rects = None if FrameTracker._full else FrameTracker._rects
+            FrameTracker._rects = []
+            FrameTracker._full = False
+        return rects
+
+    @staticmethod
+    def count(written):
+        """Count a frame as written to the display or skipped
+        """
+        if written:
+            FrameTracker.frames_written += 1
+        else:
+            FrameTracker.frames_skipped += 1
+
+
+class GlyphAtlas:
+    """Glyphs for numeric text, rendered once per font in white
+
+    Text made only of these characters is laid out from the glyph advances
+    and the kerning of each character pair, measured once, and drawn by
+    blitting the glyphs, so changing numbers need no FreeType rendering.
+    Glyphs are tinted to a color when first drawn in it, and the tints of
+    the most recent colors are kept, as sensor colors change with readings.
+    """
+    chars = frozenset("0123456789:.,%°cfCF+- /")
+    max_colors = 16
+
+    def __init__(self, font):
+        self.font = font
+        self.height = font.get_height()
+        self.glyphs = {
+            char: font.render(char, True, (255, 255, 255))
+            for char in self.chars
+        }
+        self.advances = {char: font.size(char)[0] for char in self.chars}
+        self.kerning = {}
+        self.tints = {}
+
+    def kern(self, left, right):
+        """Return the kerning of a character pair
+        """
+        pair = left + right
+        if pair not in self.kerning:
+            self.kerning[pair] = self.font.size(pair)[0] - \
+                self.advances[left] - self.advances[right]
+        return self.kerning[pair]
+
+    def tint(self, char, color):
+        """Return a glyph in a color
+        """
+        glyphs = self.tints.pop(color, None)
+        if glyphs is None:
+            glyphs = {}
+            if len(self.tints) >= self.max_colors:
+                del self.tints[next(iter(self.tints))]
+        # most recently used colors last
+        self.tints[color] = glyphs
+        if char not in glyphs:
+            glyph = self.glyphs[char].copy()
+            glyph.fill(tuple(color) + (255,) * (4 - len(color)),
+                       special_flags=pygame.BLEND_RGBA_MULT)
+            glyphs[char] = glyph
+        return glyphs[char]
+
+    def layout(self, text):
+        """Return the x offsets of the characters and the text size
+        """
+        offsets = []
+        x = 0
+        previous = None
+        for char in text:
+            if previous is not None:
+                x += self.kern(previous, char)
+            offsets.append(x)
+            x += self.advances[char]
+            previous = char
+        return offsets, (x, self.height)
+
+    def render(self, surface, position, text, color, background):
+        """Draw text on surface, return its size
+        """
+        (x, y) = position
+        (offsets, size) = self.layout(text)
+        if background is not None:
+            surface.fill(background, pygame.Rect((x, y), size))
+        for char, offset in zip(text, offsets):
+            surface.blit(self.tint(char, color), (x + offset, y))
+        return size
 
 
 class WeatherModule:
     """Weather Module
     """
+    # seconds until the module has to be drawn again,
+    # None if it only changes when new data arrives
+    interval = 1
 
     def __init__(self, fonts, location, language, units, config):
         """Initialize
@@ -343,8 +535,11 @@ class WeatherModule:
         self.language = language
         self.units = units
         self.config = config
+        if "interval" in config:
+            self.interval = config["interval"]
         self.rect = pygame.Rect(config["rect"])
         self.surface = pygame.Surface((self.rect.width, self.rect.height))
+        self.static_surface = None
 
     def quit(self):
         """Destractor
@@ -354,15 +549,35 @@ class WeatherModule:
         """Draw surface
         """
 
+    def draw_static(self):
+        """Draw the parts of the module that do not change with the data
+
+        Called by clear_surface() on a cleared surface. Return True to keep
+        the drawing as the static layer, or False to draw it again next
+        time, e.g. while an icon is not ready yet.
+        """
+        return False
+
+    def invalidate_static(self):
+        """Draw the static layer again on the next clear_surface()
+        """
+        self.static_surface = None
+
     def clear_surface(self):
-        """Clear Surface
+        """Clear Surface to the static layer
         """
+        if self.static_surface is not None:
+            self.surface.blit(self.static_surface, (0, 0))
+            return
         self.surface.fill(pygame.Color("black"))
+        if self.draw_static():
+            self.static_surface = self.surface.copy()
 
     def update_screen(self, screen):
         """Draw surface on screen
         """
         screen.blit(self.surface, (self.rect.left, self.rect.top))
+        FrameTracker.add(self.rect)
 
     def text_size(self, text, size, *, bold=False):
         """Determine the amount of space needed to render text
@@ -371,28 +586,40 @@ class WeatherModule:
             return (0, 0)
         return self.font(size, bold).size(text)
 
+    def fit_text(self, *texts, bold=False, top=0, separator=" "):
+        """
+        Choose the largest font size that fits texts in the module.
+
+        Parameters
+        ----------
+        texts:
+            texts to draw side by side joined by separator, or one per line
+            if they do not fit. Empty texts are skipped.
+        bold:
+            bold flag.
+        top:
+            height above the texts that is used by other drawings
+
+        Returns
+        -------
+        (size, lines): font size ["large", "medium", "small"] and lines to draw
+        """
+        texts = tuple(text for text in texts if text)
+        if not texts:
+            return "small", ()
+        sizes = tuple((size, self.fonts["size"][size])
+                      for size in ("large", "medium", "small"))
+        return Utils.fit_text(self.fonts["name"], sizes, bold, texts, separator,
+                              self.rect.width, self.rect.height - top)
+
     def text_warp(self, text, line_width, size, *, bold=False, max_lines=0):
         """Text wrapping
         """
-        font = self.font(size, bold)
-        lines = []
-        cur_line = ""
-        cur_width = 0
-        for char in text:
-            (width, _height) = font.size(char)
-            if cur_width + width > line_width:
-                lines.append(cur_line)
-                cur_line = ""
-                cur_width = 0
-            cur_line += char
-            cur_width += width
-        if cur_line:
-            lines.append(cur_line)
-        if 0 < max_lines < len(lines):
-            # Put a placeholder if the text is truncated
-            lines = lines[:max_lines]
-            lines[max_lines - 1] = lines[max_lines - 1][:-2] + ".."
-        return lines
+        if isinstance(size, str):
+            size = self.fonts["size"][size]
+        return list(
+            Utils.text_warp(self.fonts["name"], size, bold, text, line_width,
+                            max_lines))
 
     def font(self, size, bold):
         """Create a new Font object
@@ -435,14 +662,28 @@ class WeatherModule:
             return position
 
         (x, y) = position
-        font = self.font(size, bold)
-        (width, height) = font.size(text)
-        color = Utils.color(color) if isinstance(color, str) else color
+        if isinstance(size, str):
+            size = self.fonts["size"][size]
+        color = Utils.color(color) if isinstance(color, str) else tuple(color)
+        if not (background is None or isinstance(background, str)):
+            background = tuple(background)
+        if GlyphAtlas.chars.issuperset(text):
+            # numbers are drawn from the glyph atlas
+            atlas = Utils.glyph_atlas(self.fonts["name"], size, bold)
+            (_offsets, (width, height)) = atlas.layout(text)
+        else:
+            atlas = None
+            image = Utils.text_surface(self.fonts["name"], size, bold, text,
+                                       color, background)
+            (width, height) = image.get_size()
         if align == "center":
             x = (self.rect.width - width) / 2
         elif align == "right":
             x = self.rect.width - width
-        self.surface.blit(font.render(text, True, color, background), (x, y))
+        if atlas:
+            atlas.render(self.surface, (x, y), text, color, background)
+        else:
+            self.surface.blit(image, (x, y))
         (right, bottom) = (x + width, height)
         return right, bottom
 
@@ -463,11 +704,15 @@ class WeatherModule:
             return position
 
         (x, y) = position
+        image = Utils.sprite(image, self.surface)
         (width, height) = image.get_size()
         if angle:
             image = pygame.transform.rotate(image, angle)
             x = x + (width - image.get_width()) / 2
             y = height + (height - image.get_height()) / 2
-        self.surface.blit(image, (x, y))
+        self.surface.blit(
+            image, (x, y),
+            special_flags=pygame.BLEND_PREMULTIPLIED
+            if self.surface.get_flags() & pygame.SRCALPHA else 0)
         (right, bottom) = (x + width, y + height)
         return right, bottom